@@ -52,4 +52,6 @@ these scripts are super specific/organized, and one should copy an existing
 script to start from a working base
 """
 import eco_6.modules.nevo_director as evo
-import eco_6.modules.session_utils as esu
\ No newline at end of file
+import eco_6.modules.islands as islands # N NevoDirectors in local processes with migration
+import eco_6.modules.session_utils as esu
+import eco_6.modules.env as env # batched environments, NevoDirector.envStep()
\ No newline at end of file
@@ -0,0 +1,191 @@
+"""
+Batched Environments
+one Env holds the state of a whole population's problem as [popSize, episodes] tensors,
+so a timestep is a handful of in place tensor ops instead of a driver's per frame python
+--
+protocol (subclass Env):
+reset(): new episode, write the start state (and its reward)
+observe() -> features: fill the preallocated self.observation in place and return it,
+    sized for NevoDirector.feedForward(): [popSize, 1, featureInputLength] ([popSize, episodes, 1, ...] with sim episodes > 1)
+step(action): advance every member one timestep on feedForward()'s output, update self.reward in place
+self.reward [popSize, episodes]: reward of the current state, valid after reset() & every step()
+--
+NevoDirector.envStep(env) drives one observe -> feed forward -> step timestep,
+NevoDirector.rollout(env, numTimesteps) a whole run of them (rolloutStep(), optionally torch.compile'd)
+--
+PolecartEnv: examples/polecart's cart physics, the reference implementation
+"""
+import math
+import torch
+from eco_6.modules.multigrid import runPlan
+from eco_6.eco_print import EcoPrint
+
+
+class Env:
+    def __init__(self, ndir, featureInputLength: int):
+        """Preallocate observation & reward for ndir's population, featureInputLength has to match the grid's"""
+        self.popSize = ndir.grid.popSize
+        self.episodes = ndir.grid.numEpisodes
+        self.gconf = ndir.gconf
+        self.rng = ndir.rng
+        self.e = EcoPrint()
+        
+        if featureInputLength != ndir.masterConfig["grid"]["featureInputLength"]:
+            self.e.errorize(f"{type(self).__name__}() observes {featureInputLength} features, grid featureInputLength is {ndir.masterConfig["grid"]["featureInputLength"]}\n")
+        
+        self.observation = torch.zeros([self.popSize, *ndir.grid.rowShape, featureInputLength], **self.gconf)
+        self.features = self.observation.view([self.popSize, self.episodes, featureInputLength]) # [popSize, episodes, feat] view to write into
+        self.reward = torch.zeros([self.popSize, self.episodes], **self.gconf)
+    
+    def reset(self):
+        """New episode for every member"""
+        raise NotImplementedError(f"{type(self).__name__}.reset()")
+    
+    def observe(self) -> torch.Tensor:
+        """Write the current state into self.observation, return it"""
+        raise NotImplementedError(f"{type(self).__name__}.observe()")
+    
+    def step(self, action: torch.Tensor):
+        """Advance one timestep, action: feedForward() output"""
+        raise NotImplementedError(f"{type(self).__name__}.step()")
+    
+    def newState(self) -> torch.Tensor:
+        """[popSize, episodes] state / scratch texture"""
+        return torch.zeros([self.popSize, self.episodes], **self.gconf)
+
+
+# --------------------------- POLECART ---------------------------
+class PolecartEnv(Env):
+    """
+    Cart with a pole that starts randomly in the bottom third of the circle, the net has to swing it up\n
+    observation: [x, theta], action: force, reward: cos(theta) (1 upright, -1 hanging)\n
+    every member shares the start theta of its episode, drawn from the "env" rng
+    """
+    TOTAL_MASS = 1.1
+    LENGTH_POLE = .5
+    POLE_MASS_LENGTH = .05
+    TAU = .02 # time between
+    GRAVITY = 9.8
+    SLOW_AMT = .95 # theta velocity drag near the top
+    X_CLAMP = 60.
+    
+    def __init__(self, ndir):
+        Env.__init__(self, ndir, 2)
+        
+        # state
+        self.x = self.newState()         # cart x position
+        self.xDot = self.newState()      # cart x velocity
+        self.theta = self.newState()     # pole angle measured 0 at top
+        self.thetaDot = self.newState()  # pole angular velocity
+        self.force = self.newState()     # last action
+        
+        # scratch, so a step allocates nothing
+        self.costheta = self.newState()
+        self.sintheta = self.newState()
+        self.temp = self.newState()
+        self.thetaacc = self.newState()
+        self.xacc = self.newState()
+        self.mask = self.newState() # float 1/0 masks
+    
+    def reset(self):
+        """Cart at rest in the middle, theta random near bottom pi+-1 per episode"""
+        for texture in [self.x, self.xDot, self.thetaDot, self.force]: texture.zero_()
+        host = self.rng.host("env")
+        for episode in range(self.episodes):
+            self.theta[:, episode] = math.pi + (host.random() - .5) * 2 # 2.14 to 4.14 theta
+        self.unrotateTheta()
+        self.updateReward()
+    
+    def observe(self) -> torch.Tensor:
+        self.features[..., 0].copy_(self.x)
+        self.features[..., 1].copy_(self.theta)
+        return self.observation
+    
+    def step(self, action: torch.Tensor):
+        self.force.copy_(action.view(self.force.size()))
+        self.cartPhysics()
+        self.unrotateTheta()
+        self.clampX()
+        self.updateReward()
+    
+    
+    # -------- PHYSICS --------
+    def cartPhysics(self):
+        """One TAU of cart & pole physics on the whole population, in place"""
+        # ~~ trig ~~
+        torch.cos(self.theta, out=self.costheta)
+        torch.sin(self.theta, out=self.sintheta)
+        
+        # ~~ temp ~~ # temp is a badly named var, but it came from the .c code
+        torch.mul(self.thetaDot, self.thetaDot, out=self.temp)
+        self.temp *= self.sintheta
+        self.temp *= self.POLE_MASS_LENGTH
+        self.temp += self.force
+        self.temp /= self.TOTAL_MASS
+        
+        # ~~ thetaacc ~~ (sin * g - cos * temp) / ((4/3 - cos^2 * .1 / mass) * length)
+        torch.mul(self.costheta, self.temp, out=self.thetaacc)
+        self.thetaacc.mul_(-1.).add_(self.sintheta, alpha=self.GRAVITY)
+        torch.mul(self.costheta, self.costheta, out=self.xacc) # xacc holds the divisor for now
+        self.xacc.mul_(-.1 / self.TOTAL_MASS).add_(4 / 3).mul_(self.LENGTH_POLE)
+        self.thetaacc /= self.xacc
+        
+        # ~~ xacc ~~ temp - cos * thetaacc * pml / mass
+        torch.mul(self.costheta, self.thetaacc, out=self.xacc)
+        self.xacc.mul_(-self.POLE_MASS_LENGTH / self.TOTAL_MASS).add_(self.temp)
+        
+        # ~~ accumulate ~~
+        self.x.add_(self.xDot, alpha=self.TAU)
+        self.xDot.add_(self.xacc, alpha=self.TAU)
+        self.theta.add_(self.thetaDot, alpha=self.TAU)
+        self.thetaDot.add_(self.thetaacc, alpha=self.TAU)
+        
+        # catch a weird bug where the pole just keeps spinning???
+        # give it theta velocity drag while abs(theta) < .4
+        torch.abs(self.theta, out=self.mask)
+        self.mask.lt_(.4).mul_(self.SLOW_AMT - 1.).add_(1.) # SLOW_AMT inside, 1 outside
+        self.thetaDot *= self.mask
+    
+    def unrotateTheta(self):
+        """
+        Anything outside of 1 rotation of theta will ruin network input regularization
+        always unrotate it so theta between -pi to pi
+        """
+        FULLROT = 2 * math.pi
+        
+        # above pi
+        torch.gt(self.theta, math.pi, out=self.mask)
+        self.theta.add_(self.mask, alpha=-FULLROT)
+        
+        # below -pi
+        torch.le(self.theta, -math.pi, out=self.mask)
+        self.theta.add_(self.mask, alpha=FULLROT)
+    
+    def clampX(self):
+        """Clamp x to +-X_CLAMP, nullifying x velocity of every cart that went past it"""
+        torch.abs(self.x, out=self.mask)
+        self.mask.le_(self.X_CLAMP)
+        self.xDot *= self.mask
+        self.x.clamp_(-self.X_CLAMP, self.X_CLAMP)
+    
+    def updateReward(self):
+        """cos(theta), a diverged (nan) theta counts as 0 like the driver's cosScore did"""
+        torch.nan_to_num(self.theta, out=self.reward)
+        self.reward.cos_()
+
+
+# --------------------------- ROLLOUT STEP ---------------------------
+def rolloutStep(env: Env, score: torch.Tensor, dropoutApplicable: bool, plan: list, computeDtype, memberIndex: torch.Tensor = None):
+    """
+    One whole timestep straight on the grid's plan: observe, feed forward, step, score += reward\n
+    memberIndex: the grid's compacted members (MultiGrid.compactMembers()) or None, the others act 0\n
+    no feature checks or chunking, see NevoDirector.rollout() for when it applies\n
+    env & plan textures are only read & written in place, so a torch.compile'd rolloutStep
+    fuses the timestep into one graph that evoStep & env.reset() never retrace
+    """
+    x = env.observe().to(computeDtype)
+    if memberIndex is not None: x = x.index_select(0, memberIndex)
+    action = runPlan(x, dropoutApplicable, plan)
+    if memberIndex is not None: action = action.new_zeros([env.popSize, *action.size()[1:]]).index_copy_(0, memberIndex, action)
+    env.step(action.to(score.dtype))
+    score += env.reward
@@ -0,0 +1,153 @@
+"""
+Evaluation Pool
+shards the population dimension of one NevoDirector across cpu worker processes
+so feed forward & environment python overhead runs on every core instead of one
+--
+genome & back genome live in torch shared memory (MultiGrid.shareGenome()),
+every worker owns a NevoDirector of its shard's popSize bound to its rows of them,
+so evoStep results show up in the workers without any copying
+--
+per generation the main process only sends which of the two genomes is live, the dropout masks
+& its "env" rng stream state, workers reset lstm memory, load the env stream, run evalGeneration(ndir)
+on their shard and write their score rows into a shared score texture; the main process continues
+its env stream from the first shard's, as if it had run the generation itself
+--
+every shard draws the same env randomness the main process would, so shared initial conditions
+(ex. polecart's start thetas) are shared across shards too; draws sized by popSize differ per shard
+(a shard's popSize is its member count), so only deterministic problems, or ones whose env draws
+don't depend on popSize, score exactly like sim["evalWorkers"] 0
+--
+driver (same evalGeneration runs with sim["evalWorkers"] 0):
+def evalGeneration(ndir) -> torch.Tensor: run one generation of the problem, return score [ndir.grid.popSize]
+has to be a top level function of the driver, and the driver needs an if __name__ == "__main__": guard
+since workers are spawned processes that re-import it
+"""
+import os
+import copy
+import queue
+import torch
+import torch.multiprocessing as mp
+from deepmerge import always_merger
+from eco_6.eco_print import EcoPrint
+
+
+class EvalPool:
+    # --------------------------- INIT ---------------------------
+    def __init__(self, ndir, evalGeneration):
+        """Spawn sim["evalWorkers"] workers (at most popSize), each gets a contiguous slice of members"""
+        self.ndir = ndir
+        self.evalGeneration = evalGeneration
+        self.e = EcoPrint()
+        
+        if ndir.gconf["device"].type != "cpu":
+            self.e.errorize(f"EvalPool.__init__() shares the genome through cpu shared memory, device is {ndir.gconf["device"]}\n")
+        
+        popSize = ndir.grid.popSize
+        numWorkers = min(ndir.masterConfig["sim"]["evalWorkers"], popSize)
+        threads = max(1, (os.cpu_count() or 1) // numWorkers)
+        bounds = [(popSize * workerIndex) // numWorkers for workerIndex in range(numWorkers + 1)]
+        
+        # shared textures
+        self.genomes = ndir.grid.shareGenome()
+        self.scores = torch.zeros([popSize], **ndir.gconf).share_memory_()
+        
+        context = mp.get_context("spawn")
+        self.doneQueue = context.Queue()
+        self.taskQueues = []
+        self.processes = []
+        for workerIndex in range(numWorkers):
+            start, end = bounds[workerIndex], bounds[workerIndex + 1]
+            seed = ndir.masterConfig["sim"]["seed"]
+            configOverride = always_merger.merge(copy.deepcopy(ndir.configOverride or {}), {
+                "sim": {
+                    "popSize": end - start,
+                    "populate": "new",
+                    "seed": None if seed is None else seed + 1 + workerIndex,
+                    "evalWorkers": 0
+                },
+                "evo": {"encoding": "full"}
+            })
+            
+            taskQueue = context.Queue()
+            process = context.Process(target=runEvalWorker, args=(
+                start, end, ndir.confo, configOverride, evalGeneration,
+                self.genomes, self.scores, taskQueue, self.doneQueue, threads
+            ), daemon=True)
+            process.start()
+            self.taskQueues.append(taskQueue)
+            self.processes.append(process)
+    
+    
+    # --------------------------- EVALUATE ---------------------------
+    def evaluate(self) -> torch.Tensor:
+        """Run one generation on every shard, block until all are done, returns score [popSize]"""
+        grid = self.ndir.grid
+        if grid.genome is self.genomes[0]: liveIndex = 0
+        elif grid.genome is self.genomes[1]: liveIndex = 1
+        else:
+            self.e.errorize("EvalPool.evaluate() grid genome was replaced outside evolution, restart the pool\n")
+            return None
+        
+        dropmasks = {label: texture for label, texture in grid.textureCrate.items() if label.endswith("_dropmask")}
+        envState = self.ndir.rng.getStreamState("env") # every shard starts from the same env draws
+        for taskQueue in self.taskQueues: taskQueue.put((liveIndex, dropmasks, envState))
+        
+        # a crashed worker would never report done
+        numDone = 0
+        while numDone < len(self.processes):
+            try:
+                start, workerEnvState = self.doneQueue.get(timeout=.5)
+                if start == 0: self.ndir.rng.setStreamState("env", workerEnvState) # next generation draws new conditions
+                numDone += 1
+            except queue.Empty:
+                if not all(process.is_alive() for process in self.processes):
+                    self.close()
+                    raise RuntimeError("EvalPool.evaluate() a worker process died")
+        
+        return self.scores.clone()
+    
+    def close(self):
+        """Stop every worker"""
+        for taskQueue in self.taskQueues: taskQueue.put(None)
+        for process in self.processes: process.join(timeout=5)
+        self.taskQueues = []
+        self.processes = []
+
+
+# --------------------------- WORKER PROCESS ---------------------------
+def runEvalWorker(
+    start: int,
+    end: int,
+    confo: list,
+    configOverride: dict,
+    evalGeneration,
+    genomes: tuple[torch.Tensor],
+    scores: torch.Tensor,
+    taskQueue,
+    doneQueue,
+    threads: int
+):
+    """One shard: own NevoDirector of popSize end - start, its genome rebound to rows [start:end] of the live shared genome"""
+    from eco_6.modules.nevo_director import NevoDirector # deferred, nevo_director imports this module
+    torch.set_num_threads(threads)
+    ndir = NevoDirector(torch.device("cpu"), genomes[0].dtype, confo, configOverride)
+    if ndir.grid.genomeSize != genomes[0].size(1):
+        ndir.e.errorize(f"eval worker [{start}:{end}] genome size {ndir.grid.genomeSize} doesn't match {genomes[0].size(1)}\n")
+        return
+    shards = [genome[start:end] for genome in genomes]
+    
+    while True:
+        task = taskQueue.get()
+        if task is None: return
+        liveIndex, dropmasks, envState = task
+        
+        if ndir.grid.genome is not shards[liveIndex]: ndir.grid.bindGenome(shards[liveIndex])
+        ndir.grid.invalidateShadow() # frozen layers get evolved in place, no rebind
+        if dropmasks:
+            ndir.grid.textureCrate.update(dropmasks)
+            ndir.grid.invalidatePlan()
+        ndir.grid.resetMemory()
+        ndir.rng.setStreamState("env", envState)
+        
+        scores[start:end] = evalGeneration(ndir)
+        doneQueue.put((start, ndir.rng.getStreamState("env")))
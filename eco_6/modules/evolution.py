@@ -1,6 +1,9 @@
 """
 Evolution will create a new population given an old population and a score
 --
+evo.method "ga" uses the destination code methods below,
+evo.method "es" is an evolution strategy instead, see esStep()
+--
 evolution methods:
 ~~ tourneyCross ~~ not implemented
 semi-bracket battle for best score, chooses best tourneyBestRate% of the time
@@ -26,6 +29,7 @@ selection pressure and increasing uniqueness in the face of pure competition
 remainder of non chosen. rates given as a 1=100%, generally .02 or .005
 hardfork will choose a completely different value for a gene
 softfork will nudge in a direction default of mean=0, variance=softforkMult
+minfork will shrink a gene by minforkMult
 
 
 --
@@ -51,14 +55,21 @@ FORK        = 80
 import torch
 from eco_6.eco_print import EcoPrint
 import random
+import math
 from eco_6.timing import timing, getTimeTrackedObjs
+from eco_6.modules.noise_table import NoiseTable
+
+# fork rates below this sample a binomial mutation count & positions instead of a chance per gene,
+# work then scales with the number of mutated genes rather than genome size
+SPARSE_FORK_RATE = 0.01
 
 
 class Evolution:
     # --------------------------- init ---------------------------
     def __init__(self, 
         masterConfig, # master config loaded from config & overrides
-        gconf         # gpu device and dtype
+        gconf,        # gpu device and dtype
+        rng           # RngManager, streams: selection, fork, cross, reroll, init
     ):
         """
         Evolution init = config only\n
@@ -66,11 +77,34 @@ class Evolution:
         self.evocon = masterConfig["evo"]
         self.popSize = masterConfig["sim"]["popSize"]
         self.gconf = gconf
+        self.rng = rng
         self.getTimeTrackedObjs = getTimeTrackedObjs # allows outside scripts to get evo time trackings
         
         self.e = EcoPrint()
         self.destinationMask = None
         
+        # generation selection plan, see createSelectionPlan()
+        self.tourneyIndex = None
+        self.crossIndex = None
+        self.parentIndex = None
+        self.codeIndex = {}
+        
+        # preallocated scratch for the subset ops, see getScratch()
+        # subsets get processed in chunks of scratchRows members so scratch stays a fixed ~1/8 of the genome
+        self.scratchRows = max(1, (self.popSize + 7) // 8)
+        self.scratch = None # (floatA, floatB, boolMask) each flat [scratchRows * genomeSize]
+        
+        # seed-chain lineage, only kept with evo.encoding "seeds", see createLineage()
+        self.lineage = None
+        
+        # pregenerated normal noise for fork, reroll & es, see drawNormal()
+        noisecon = self.evocon["noiseTable"]
+        self.noise = NoiseTable(noisecon["size"], noisecon["seed"], gconf, noisecon["path"]) if noisecon["size"] > 0 else None
+        
+        # evolution strategy state, evo.method "es", see esStep()
+        self.esMean = None # [genomeSize]
+        self.esSigma = None # [genomeSize], all es.sigma unless es.adaptSigma
+        
         # need to add an int gconf for reindexing and masking
         self.gconf_int = {
             "dtype": torch.int,
@@ -98,7 +132,7 @@ class Evolution:
         # randDistro starts with roll domain, turns to 99 for completed
         randDistribute = torch.randint(
             low=0, high=20, # domain=[0, 20)
-            size=[self.popSize], **self.gconf_int8
+            size=[self.popSize], generator=self.rng["selection"], **self.gconf_int8
         )
         
         # 1-member elitism by changing topmost to 0 (do not evolve)
@@ -144,140 +178,414 @@ class Evolution:
         # DEBUG::set destmask to something known
         #self.destinationMask = torch.tensor([80, 80, 80, 80, 99, 99], **self.gconf).view([-1, 1, 1])
 
+    @timing
+    def createSelectionPlan(self, scoreTexture_1d: torch.Tensor):
+        """
+        One selection plan per generation, applied to every texture evolved this generation
+        so all layers of an offspring come from the same parents\n
+        destinationMask [popSize, 1, 1]: evolution code per member (see createDestinationMask)\n
+        tourneyIndex [popSize]: tournament winner per slot\n
+        crossIndex [popSize]: crossover partner per slot\n
+        parentIndex [popSize]: slot each member gathers from, tourney=winner, cross=partner, rest=itself\n
+        codeIndex {code: [numMembers]}: member indices for cross, reroll & fork
+        """
+        self.createDestinationMask(scoreTexture_1d)
+        
+        # -------- TOURNEY --------
+        # https://algorithmafternoon.com/books/genetic_algorithm/chapter04/
+        # max-compression: each of maxCompressions will create a reindexing and
+        # store index of max value element, compressing it for another loop or until end
+        # priorIdx acts as the max-compressed indices, init to unshuffled
+        priorIdx = torch.arange(0, self.popSize, **self.gconf_int) # [popSize]
+        
+        # ensure score is 1d
+        if len(scoreTexture_1d.size()) > 1: 
+            self.e.err(f"ndir.evo.createSelectionPlan() ran into {scoreTexture_1d.size()} num of dims. should be 1.\n")
+        
+        # scoreTexture_1d acts as an anchor that should not change past here, only the Idx will change
+        for _ in range(self.evocon["tournaments"]["maxCompressions"]):
+            reindex = torch.randperm(self.popSize, generator=self.rng["selection"], **self.gconf_int)
+            currIdx = priorIdx[reindex]
+            currScore = scoreTexture_1d[currIdx]
+            
+            # argmax
+            priorIdx = torch.where(currScore > scoreTexture_1d, currIdx, priorIdx)
+        self.tourneyIndex = priorIdx
+        
+        # -------- CROSS --------
+        # parentB: other member to be crossed with, shuffled in a z:0:popSize axis
+        self.crossIndex = torch.randperm(n=self.popSize, generator=self.rng["selection"], **self.gconf_int)
+        
+        # -------- PARENTS --------
+        codes = self.destinationMask.view([-1])
+        parentIndex = torch.arange(0, self.popSize, **self.gconf_int)
+        parentIndex = torch.where(codes == 10, self.tourneyIndex, parentIndex)
+        parentIndex = torch.where(codes == 20, self.crossIndex, parentIndex)
+        self.parentIndex = parentIndex
+        
+        # -------- SUBSETS --------
+        # member indices per code, ops only generate randomness for their own members
+        self.codeIndex = {code: torch.nonzero(codes == code).view([-1]) for code in [20, 55, 80]}
+
+    def getScratch(self, numRows: int, width: int) -> tuple[torch.Tensor]:
+        """
+        Return contiguous (floatA, floatB, boolMask) scratch views [numRows, width]\n
+        allocated on first use for the widest texture evolved, only reallocated if a wider one shows up
+        """
+        size = self.scratchRows * width
+        if (self.scratch is None) or (self.scratch[0].numel() < size):
+            self.scratch = (
+                torch.empty([size], **self.gconf),
+                torch.empty([size], **self.gconf),
+                torch.empty([size], dtype=torch.bool, device=self.gconf["device"])
+            )
+        return tuple(tex[:numRows * width].view([numRows, width]) for tex in self.scratch)
+    
+    def drawNormal(self, out: torch.Tensor, stream: str):
+        """
+        Fill out with standard normal noise: a noise table slice at a random offset with evo.noiseTable,
+        otherwise (or if out is bigger than the table) a fresh draw from the rng stream
+        """
+        noise = self.noise.sample(out.numel(), self.rng.host(stream)) if self.noise is not None else None
+        if noise is None: out.normal_(generator=self.rng[stream])
+        else: out.copy_(noise.view(out.size()))
+    
+    def subsetChunks(self, code: int):
+        """Yield member indices of code in chunks of at most scratchRows"""
+        memberIndex = self.codeIndex[code]
+        for start in range(0, memberIndex.numel(), self.scratchRows):
+            yield memberIndex[start:start + self.scratchRows]
+    
+    def createDefrostPlan(self, layerPrefixes: list) -> list:
+        """
+        Return the layer prefixes allowed to evolve this generation\n
+        a layer is skipped if it's listed in defrost.frozen, otherwise it defrosts with defrost.chance
+        """
+        frozen = [str(prefix) for prefix in self.evocon["defrost"]["frozen"]]
+        return [
+            prefix for prefix in layerPrefixes
+            if (str(prefix) not in frozen) and (self.rng.host("selection").random() < self.evocon["defrost"]["chance"])
+        ]
+    
+    @timing
+    def opGather(self, originTex: torch.Tensor, mergeTex: torch.Tensor):
+        """
+        Tourney -- CODE 10, and crossover parentB -- CODE 20\n
+        one gather along the population dim using the generation's parentIndex,
+        written straight into the preallocated mergeTex [popSize, genomeSize]:
+        tourney slots get their winner, cross slots get parentB (crossed in opCross),
+        elite, stayover, fork & reroll slots keep themselves
+        """
+        torch.index_select(originTex, 0, self.parentIndex, out=mergeTex)
+
     @timing
     def opFork(self, 
         originTex: torch.Tensor,
         mergeTex: torch.Tensor
-    ) -> torch.Tensor:
+    ):
         """
         Fork -- CODE 80
         softfork: nudge gene
         hardfork: reroll gene
         minfork: minimize to smaller weight
         --
+        fork slots already hold themselves after opGather, so every fork mutates mergeTex in place
         """
-        # -------- SOFTFORK --------
-        # create softfork / nudge tensor
-        nudge = torch.randn(originTex.size(), **self.gconf) # mean=0 var=1
-        nudge *= self.evocon["rates"]["softforkMult"] # mean=0 var=softforkMult
-        
-        # create softfork chance tensor, full 3d size
-        nudgeChance = torch.rand(originTex.size(), **self.gconf) # 0-1
-        
-        # mask
-        nudge = torch.where(nudgeChance < self.evocon["rates"]["softforkRate"], nudge, 0) # chance to nudge
-        # nudge = torch.where(self.destinationMask == 80, nudge, 0) # dest mask
-        
+        rates = self.evocon["rates"]
+        self.forkGenes(mergeTex, rates["softforkRate"], "soft")
+        self.forkGenes(mergeTex, rates["hardforkRate"], "hard")
+        self.forkGenes(mergeTex, rates["minforkRate"], "min")
+    
+    def forkGenes(self, mergeTex: torch.Tensor, rate: float, mode: str):
         """
+        Each gene of every fork member mutates with chance rate\n
+        mode "soft": += normal * softforkMult, "hard": new normal, "min": *= minforkMult
+        """
+        if rate <= 0.0: return
+        if rate < SPARSE_FORK_RATE: return self.forkGenesSparse(mergeTex, rate, mode)
         
-        # -------- HARDFORK --------
-        # create reroll tensor
-        reroll = torch.randn(tcItem.size(), **self.gconf)
-        #if tcKey == "w_i": print(f"a: {reroll}\n")
-        
-        # create hardfork chance tensor
-        rerollChance = torch.rand(tcItem.size(), **self.gconf) # 0-1
-        
-        # mask in chance to fork
-        reroll = torch.where(rerollChance < self.hardforkRate, reroll, 0)
-        #if tcKey == "w_i": print(f"b: {reroll}\n")
+        # only fork members get randomness, [numForked, genomeSize] per chunk
+        for forkIndex in self.subsetChunks(80):
+            noise, genes, chanceMask = self.getScratch(forkIndex.numel(), mergeTex.size(1))
+            
+            # create chance mask
+            torch.rand(noise.size(), generator=self.rng["fork"], **self.gconf, out=noise) # 0-1
+            torch.lt(noise, rate, out=chanceMask)
+            
+            # -------- SOFTFORK --------
+            if mode == "soft":
+                self.drawNormal(noise, "fork") # mean=0 var=1
+                noise *= self.evocon["rates"]["softforkMult"] # mean=0 var=softforkMult
+                noise *= chanceMask
+                mergeTex.index_add_(0, forkIndex, noise)
+                continue
+            
+            torch.index_select(mergeTex, 0, forkIndex, out=genes)
+            
+            # -------- HARDFORK --------
+            if mode == "hard":
+                self.drawNormal(noise, "fork")
+                torch.where(chanceMask, noise, genes, out=genes)
+            
+            # -------- MINFORK --------
+            elif mode == "min":
+                torch.mul(genes, self.evocon["rates"]["minforkMult"], out=noise)
+                torch.where(chanceMask, noise, genes, out=genes)
+            
+            mergeTex.index_copy_(0, forkIndex, genes)
+    
+    def forkGenesSparse(self, mergeTex: torch.Tensor, rate: float, mode: str):
+        """
+        Low rate forkGenes: draw the number of mutated genes ~ binomial(numForkGenes, rate),
+        then only that many positions & values\n
+        positions are drawn with replacement, a gene hit twice gets nudged twice / rerolled or shrunk once
+        """
+        forkIndex = self.codeIndex[80]
+        width = mergeTex.size(1)
+        numGenes = forkIndex.numel() * width
+        if numGenes == 0: return
         
-        # mask in destinationMask == fork code
-        reroll = torch.where(self.destinationMask == 80, reroll, 0)
-        #if tcKey == "w_i": print(f"c: {reroll}\n")
+        numMutations = self.rng.host("fork").binomialvariate(numGenes, rate)
+        if numMutations == 0: return
         
-        # merge by where logic
-        gridRef[tcKey] = torch.where(reroll != 0, reroll, gridRef[tcKey])
+        # flat position inside the fork subset -> (member row, genome col)
+        position = torch.randint(numGenes, [numMutations], generator=self.rng["fork"], device=self.gconf["device"])
+        rows = forkIndex[position // width]
+        cols = position % width
         
-        return gridRef
-        """
+        # -------- SOFTFORK --------
+        if mode == "soft":
+            nudge = torch.empty([numMutations], **self.gconf)
+            self.drawNormal(nudge, "fork")
+            nudge *= self.evocon["rates"]["softforkMult"]
+            mergeTex.index_put_((rows, cols), nudge, accumulate=True)
         
-        # ret actual nudge where fork is ordered
-        return torch.where(self.destinationMask == 80, originTex + nudge, mergeTex)
+        # -------- HARDFORK --------
+        elif mode == "hard":
+            reroll = torch.empty([numMutations], **self.gconf)
+            self.drawNormal(reroll, "fork")
+            mergeTex.index_put_((rows, cols), reroll)
+        
+        # -------- MINFORK --------
+        elif mode == "min":
+            mergeTex.index_put_((rows, cols), mergeTex[rows, cols] * self.evocon["rates"]["minforkMult"])
 
     @timing
     def opCross(self, 
         parentAData: torch.Tensor,
         mergeTex: torch.Tensor
-    ) -> torch.Tensor:
+    ):
         """
         Crossover -- CODE 20\n
         parentA: destination member, must have code 20
-        parentB: other member to be crossed with, does not need code 20
+        parentB: other member to be crossed with, does not need code 20,
+        already gathered into mergeTex cross slots by opGather
         """
-        
-        # reindex
-        parentBIndex = torch.randperm(n=self.popSize, **self.gconf_int)
-        # create parentB, reindexing from parentAData (this texture), shuffled in a z:0:popSize axis
-        parentBData = parentAData[parentBIndex]
-        
-        # here parentBData should be shuffled texture
-        
-        # 50:50 split & merge parents into B
-        splitAB = torch.rand(parentAData.size(), **self.gconf) # 0-1
-        parentBData = torch.where(splitAB > .5, parentAData, parentBData)
-        
-        # return crossed pop where ordered, rest 0s
-        return torch.where(self.destinationMask == 20, parentBData, mergeTex)
+        # only cross members get a split, [numCrossed, genomeSize] per chunk
+        for crossIndex in self.subsetChunks(20):
+            parentB, parentA, splitAB = self.getScratch(crossIndex.numel(), mergeTex.size(1))
+            
+            # 50:50 split
+            torch.rand(parentB.size(), generator=self.rng["cross"], **self.gconf, out=parentB) # 0-1, parentB not gathered yet
+            torch.gt(parentB, .5, out=splitAB)
+            
+            # merge parents & scatter back
+            torch.index_select(parentAData, 0, crossIndex, out=parentA)
+            torch.index_select(mergeTex, 0, crossIndex, out=parentB)
+            torch.where(splitAB, parentA, parentB, out=parentB)
+            mergeTex.index_copy_(0, crossIndex, parentB)
 
     @timing
-    def opTourney(self, 
-        originTex: torch.Tensor,
-        scoreTexture_1d: torch.Tensor
-    ) -> torch.Tensor:
+    def opReroll(self, originTex: torch.Tensor, mergeTex: torch.Tensor):
+        """Reroll -- CODE 55"""
+        # create reroll rows for reroll members only & scatter back
+        for rerollIndex in self.subsetChunks(55):
+            reroll, _, _ = self.getScratch(rerollIndex.numel(), mergeTex.size(1))
+            self.drawNormal(reroll, "reroll")
+            mergeTex.index_copy_(0, rerollIndex, reroll)
+    
+    # --------------------------- EVOLUTION STRATEGY ---------------------------
+    @timing
+    def esStep(self, 
+        originTex: torch.Tensor, 
+        mergeTex: torch.Tensor, 
+        scoreTexture_1d: torch.Tensor, 
+        spans: list[tuple[int, int]]
+    ):
         """
-        Tourney -- CODE 10
-        https://algorithmafternoon.com/books/genetic_algorithm/chapter04/
-        new:
-        max-compression for each maxCompressions will create a reindexing and 
-        store index of max value element and compress it for another loop or until end
+        Evolution strategy generation (evo.method "es"), OpenAI-ES / SNES style\n
+        originTex [popSize, genomeSize] holds this generation's samples mean + sigma * eps:
+        eps gets recovered into mergeTex, rank shaped scores move the mean (natural gradient)
+        and with es.adaptSigma the per gene sigma, then the next samples get written into mergeTex\n
+        first call has no samples to learn from, the mean starts at the best member of the grid
+        and gets broadcast into every member's columns outside spans, so all samples share one base network
+        --
+        only genome columns inside spans take part, frozen layers stay as they are
         """
+        escon = self.evocon["es"]
         
-        # setup
-        # priorIdx acts as the max-compressed indices
-        priorIdx = torch.arange(0, self.popSize, **self.gconf_int) # [popSize]
-        # init to unshuffled randperm
-        # scoreTexture_1d acts as an anchor that should not change past here, only the Idx will change
-        # grabbing/reindexing from this
-        # print(f"p.sco {scoreTexture_1d}")
-        # ensure score is 1d
-        if len(scoreTexture_1d.size()) > 1: 
-            self.e.err(f"ndir.evo.opTourney() ran into {scoreTexture_1d.size()} num of dims. should be 1.\n")
-        
-        # loop
-        for _ in range(self.evocon["tournaments"]["maxCompressions"]):
-            reindex = torch.randperm(self.popSize, **self.gconf_int)
-            currIdx = priorIdx[reindex]
-            currScore = scoreTexture_1d[currIdx]
+        # ~~ INIT ~~
+        if self.esMean is None:
+            self.esMean = originTex[torch.argmax(scoreTexture_1d)].clone()
+            self.esSigma = torch.full_like(self.esMean, escon["sigma"])
             
-            # argmax
-            priorIdx = torch.where(currScore > scoreTexture_1d, currIdx, priorIdx)
-        
-        # here scoreTexture_1d[priorIdx] will contain max-compressed scores,
-        # and priorIdx will contain max-compressed indices
-        # print(f"{priorIdx}")
-        
-        # return a reindexed tourney slots, rest 0s
-        return torch.where(self.destinationMask == 10, originTex[priorIdx], 0)
-
-    @timing
-    def opReroll(self, originTex: torch.Tensor, mergeTex: torch.Tensor) -> torch.Tensor:
-        """Reroll -- CODE 55"""
-        
-        # create reroll tensor
-        reroll = torch.randn(originTex.size(), **self.gconf)
-        
-        # merge
-        return torch.where(self.destinationMask == 55, reroll, mergeTex)
+            # not sampled this generation (frozen or not defrosted): straight onto the live genome
+            outside = torch.ones_like(self.esMean, dtype=torch.bool)
+            for start, end in spans: outside[start:end] = False
+            originTex[:, outside] = self.esMean[outside]
+        
+        # ~~ UPDATE ~~
+        else:
+            utility = self.getRankUtility(scoreTexture_1d)
+            genomeSize = self.esMean.numel()
+            sigmaRate = escon["sigmaLearningRate"] or (3 + math.log(genomeSize)) / (5 * math.sqrt(genomeSize))
+            
+            for start, end in spans:
+                mean = self.esMean[start:end]
+                sigma = self.esSigma[start:end]
+                
+                # eps = (sample - mean) / sigma, [popSize, spanSize]
+                eps = mergeTex[:, start:end]
+                torch.sub(originTex[:, start:end], mean, out=eps)
+                eps /= sigma
+                
+                # mean += lr * sigma * sum(utility * eps)
+                mean += escon["learningRate"] * sigma * (utility @ eps)
+                
+                # sigma *= exp(sigmaRate / 2 * sum(utility * (eps^2 - 1))), utility sums to 0
+                if escon["adaptSigma"]:
+                    sigma *= torch.exp(sigmaRate / 2 * (utility @ eps.square_()))
+        
+        self.esSample(mergeTex, spans)
+    
+    def esSample(self, mergeTex: torch.Tensor, spans: list[tuple[int, int]]):
+        """
+        Write mean + sigma * eps into every member of mergeTex, inside spans\n
+        es.antithetic: 2nd half of the population mirrors the 1st (-eps), an odd last member sits on the mean
+        """
+        numRandom = self.popSize // 2 if self.evocon["es"]["antithetic"] else self.popSize
+        
+        for start, end in spans:
+            samples = mergeTex[:, start:end]
+            self.drawNormal(samples[:numRandom], "es")
+            if self.evocon["es"]["antithetic"]:
+                samples[numRandom:2 * numRandom] = samples[:numRandom]
+                samples[numRandom:2 * numRandom].neg_()
+                samples[2 * numRandom:] = 0.0
+            
+            samples *= self.esSigma[start:end]
+            samples += self.esMean[start:end]
+    
+    def getEsState(self) -> dict|None:
+        """Copies of the es mean & per gene sigma for a checkpoint, None before the first esStep()"""
+        if self.esMean is None: return None
+        return {"mean": self.esMean.clone(), "sigma": self.esSigma.clone()}
+    
+    def setEsState(self, esState: dict):
+        """Continue from a checkpoint's getEsState()"""
+        self.esMean = esState["mean"].to(**self.gconf)
+        self.esSigma = esState["sigma"].to(**self.gconf)
+    
+    def getRankUtility(self, scoreTexture_1d: torch.Tensor) -> torch.Tensor:
+        """
+        Centered rank fitness shaping, worst -.5 to best +.5, normalized to sum(|utility|) = 1\n
+        invariant to score scale & outliers, sums to 0
+        """
+        ranks = torch.empty([self.popSize], **self.gconf)
+        ranks[torch.argsort(scoreTexture_1d)] = torch.arange(self.popSize, **self.gconf)
+        utility = ranks / (self.popSize - 1) - .5
+        return utility / utility.abs().sum()
+    
+    
+    # --------------------------- SEED CHAIN ---------------------------
+    """
+    evo.encoding "seeds" (deep-GA style): a population is stored as one init seed per member
+    plus one record per member per generation instead of every weight\n
+    lineage = {
+        "initSeeds": [popSize] int64,
+        "generations": [{"records": [popSize, 4] int64, "spans": [(start col, end col), ...]}, ...]
+    }\n
+    records columns: code, seed, parent (member gathered into the slot), mate (member crossed in for code 20, else -1)
+    crossover makes lineage a graph, not a chain, so a population gets regenerated by
+    replaying every generation over the whole population rather than per member
+    """
+    def drawSeeds(self, num: int, stream: str) -> torch.Tensor:
+        """num int64 seeds from an rng stream, on cpu"""
+        return torch.randint(0, 2**62, [num], generator=self.rng[stream], dtype=torch.int64, device=self.gconf["device"]).cpu()
+    
+    def createLineage(self) -> torch.Tensor:
+        """Start a lineage for a new population, returns initSeeds [popSize] for MultiGrid.createGrid()"""
+        self.lineage = {"initSeeds": self.drawSeeds(self.popSize, "init"), "generations": []}
+        return self.lineage["initSeeds"]
+    
+    def recordGeneration(self, spans: list[tuple[int, int]]) -> dict:
+        """Append this generation's selection plan to the lineage, call after createSelectionPlan()"""
+        codes = self.destinationMask.view([-1]).long().cpu()
+        members = torch.arange(self.popSize)
+        generation = {
+            "records": torch.stack([
+                codes,
+                self.drawSeeds(self.popSize, "selection"),
+                self.parentIndex.long().cpu(),
+                torch.where(codes == 20, members, -1)
+            ], dim=1),
+            "spans": list(spans)
+        }
+        self.lineage["generations"].append(generation)
+        return generation
     
     @timing
-    def opEliteStayover(self, originTex: torch.Tensor, mergeTex: torch.Tensor) -> torch.Tensor:
-        """Elite & Stayover -- CODE 0 & 70"""
-        
-        # merge
-        merged = torch.where(self.destinationMask == 0, originTex, mergeTex)
-        merged = torch.where(self.destinationMask == 70, originTex, merged)
-        return merged
+    def applyGeneration(self, originTex: torch.Tensor, mergeTex: torch.Tensor, generation: dict):
+        """
+        Write one lineage generation into mergeTex [popSize, genomeSize], only inside generation["spans"]\n
+        gather parents, then every cross, reroll & fork member mutates from its own seeded generator
+        so the result only depends on the records, evoStep & lineage replay both go through here
+        """
+        records = generation["records"]
+        parentIndex = records[:, 2].to(self.gconf["device"])
+        for start, end in generation["spans"]:
+            torch.index_select(originTex[:, start:end], 0, parentIndex, out=mergeTex[:, start:end])
+        
+        mutated = torch.nonzero(torch.isin(records[:, 0], torch.tensor([20, 55, 80]))).view([-1])
+        for member in mutated.tolist():
+            code, seed, _, mate = records[member].tolist()
+            generator = torch.Generator(device=self.gconf["device"]).manual_seed(seed)
+            for start, end in generation["spans"]:
+                genes = mergeTex[member, start:end]
+                if code == 20: self.crossMember(genes, originTex[mate, start:end], generator)
+                elif code == 55: genes.normal_(generator=generator)
+                elif code == 80: self.forkMember(genes, generator)
+    
+    def crossMember(self, genes: torch.Tensor, mateGenes: torch.Tensor, generator: torch.Generator):
+        """Seeded opCross for one member: 50:50 split between genes (parentB) & mateGenes (parentA)"""
+        splitAB = torch.rand(genes.size(), generator=generator, **self.gconf)
+        torch.where(splitAB > .5, mateGenes, genes, out=genes)
+    
+    def forkMember(self, genes: torch.Tensor, generator: torch.Generator):
+        """Seeded opFork for one member, low rates sample a binomial count like forkGenesSparse()"""
+        rates = self.evocon["rates"]
+        for rate, mode in [(rates["softforkRate"], "soft"), (rates["hardforkRate"], "hard"), (rates["minforkRate"], "min")]:
+            if rate <= 0.0: continue
+            
+            # mutated positions
+            if rate < SPARSE_FORK_RATE:
+                numMutations = int(torch.binomial(
+                    torch.tensor([float(genes.numel())], device=self.gconf["device"]),
+                    torch.tensor([rate], device=self.gconf["device"]),
+                    generator=generator
+                ))
+                position = torch.randint(genes.numel(), [numMutations], generator=generator, device=self.gconf["device"])
+            else:
+                chance = torch.rand(genes.size(), generator=generator, **self.gconf)
+                position = torch.nonzero(chance < rate).view([-1])
+            
+            if mode == "soft":
+                nudge = torch.randn(position.size(), generator=generator, **self.gconf) * rates["softforkMult"]
+                genes.index_put_((position,), nudge, accumulate=True)
+            elif mode == "hard":
+                genes.index_put_((position,), torch.randn(position.size(), generator=generator, **self.gconf))
+            elif mode == "min":
+                genes.index_put_((position,), genes[position] * rates["minforkMult"])
     
     @timing
     def getPerfGraphSlice(self, scoreTexture: torch.Tensor) -> torch.Tensor:
@@ -0,0 +1,170 @@
+"""
+Island Model
+N NevoDirectors, one per local process, each evolving its own population on its own cpu cores / device
+--
+every evo.islands.migrationInterval generations each island sends its top evo.islands.migrants
+members one island along a ring (i -> i + 1) through a shared memory buffer laid out like the flat genome,
+they replace the receiving island's worst members (with their scores) right before its evoStep
+--
+driver:
+def evalGeneration(ndir) -> torch.Tensor: run one generation of the problem, return score [popSize]
+evalGeneration has to be a top level function of the driver, and the driver needs an
+if __name__ == "__main__": guard around IslandDirector since islands are spawned processes that re-import it
+--
+islands = eco.islands.IslandDirector([torch.device("cpu")] * 4, torch.float32, ["mainGrid"], evalGeneration)
+results = islands.run()
+"""
+import os
+import torch
+import torch.multiprocessing as mp
+from eco_6.modules.nevo_director import NevoDirector, loadMasterConfig
+from eco_6.modules.multigrid import MultiGrid
+from eco_6.eco_print import EcoPrint
+
+
+class IslandDirector:
+    # --------------------------- INIT ---------------------------
+    def __init__(self,
+        devices: list,
+        dtype,
+        confo: list,
+        evalGeneration
+    ):
+        """
+        One island per entry of devices, ex. [cpu] * 4 or [cuda:0, cuda:1]\n
+        confo: named config overrides like NevoDirector, same for every island
+        except sim["seed"] which gets + island index
+        """
+        self.devices = devices
+        self.dtype = dtype
+        self.confo = confo
+        self.evalGeneration = evalGeneration
+        self.masterConfig = loadMasterConfig(confo)
+        self.islandcon = self.masterConfig["evo"]["islands"]
+        self.e = EcoPrint()
+        
+        numIslands = len(devices)
+        numMigrants = self.islandcon["migrants"]
+        if not 0 < numMigrants < self.masterConfig["sim"]["popSize"]:
+            self.e.errorize(f"IslandDirector.__init__() evo islands migrants must be 1 to popSize - 1, got {numMigrants}\n")
+        
+        # genome size straight from the grid layout, no textures needed
+        layoutGrid = MultiGrid(self.masterConfig, {"dtype": dtype, "device": torch.device("cpu")}, None)
+        layoutGrid.buildGenomeLayout()
+        
+        # shared memory, island i writes its migrants into row i and reads row i - 1
+        self.migrantGenomes = torch.zeros([numIslands, numMigrants, layoutGrid.genomeSize], dtype=dtype).share_memory_()
+        self.migrantScores = torch.zeros([numIslands, numMigrants], dtype=dtype).share_memory_()
+        
+        # best member per island after the last generation
+        self.bestGenomes = torch.zeros([numIslands, layoutGrid.genomeSize], dtype=dtype).share_memory_()
+        self.bestScores = torch.zeros([numIslands], dtype=dtype).share_memory_()
+    
+    
+    # --------------------------- RUN ---------------------------
+    def run(self) -> list[dict]:
+        """
+        Spawn every island and block until all of them ran sim["numGenerations"]\n
+        Returns [{"island": int, "bestScore": float, "bestGenome": [genomeSize]}, ...] best island first
+        """
+        context = mp.get_context("spawn")
+        barrier = context.Barrier(len(self.devices))
+        threads = self.islandcon["threads"] or max(1, (os.cpu_count() or 1) // len(self.devices))
+        
+        processes = []
+        for islandIndex, device in enumerate(self.devices):
+            seed = self.masterConfig["sim"]["seed"]
+            configOverride = {"sim": {"seed": None if seed is None else seed + islandIndex}}
+            process = context.Process(target=runIsland, args=(
+                islandIndex, device, self.dtype, self.confo, configOverride, self.evalGeneration,
+                self.migrantGenomes, self.migrantScores, self.bestGenomes, self.bestScores,
+                barrier, threads
+            ))
+            process.start()
+            processes.append(process)
+        
+        # a crashed island would leave the others waiting on the barrier forever
+        while any(process.is_alive() for process in processes):
+            for process in processes:
+                process.join(timeout=.5)
+                if process.exitcode not in [None, 0]: barrier.abort()
+        
+        failed = [islandIndex for islandIndex, process in enumerate(processes) if process.exitcode != 0]
+        if failed: self.e.errorize(f"IslandDirector.run() islands {failed} did not finish\n")
+        
+        results = [
+            {"island": islandIndex, "bestScore": float(self.bestScores[islandIndex]), "bestGenome": self.bestGenomes[islandIndex].clone()}
+            for islandIndex in range(len(self.devices)) if islandIndex not in failed
+        ]
+        return sorted(results, key=lambda result: result["bestScore"], reverse=True)
+
+
+# --------------------------- ISLAND PROCESS ---------------------------
+def runIsland(
+    islandIndex: int,
+    device,
+    dtype,
+    confo: list,
+    configOverride: dict,
+    evalGeneration,
+    migrantGenomes: torch.Tensor,
+    migrantScores: torch.Tensor,
+    bestGenomes: torch.Tensor,
+    bestScores: torch.Tensor,
+    barrier,
+    threads: int
+):
+    """One island: its own NevoDirector evaluating & evolving, migrating every migrationInterval generations"""
+    torch.set_num_threads(threads)
+    ndir = NevoDirector(device, dtype, confo, configOverride)
+    islandcon = ndir.masterConfig["evo"]["islands"]
+    
+    # migrants get written straight into the genome, a seed-chain lineage can't record that
+    if ndir.evo.lineage is not None:
+        ndir.e.warn(f"island {islandIndex}: evo encoding seeds can't record migrants, using full\n")
+        ndir.evo.lineage = None
+    
+    numGenerations = ndir.masterConfig["sim"]["numGenerations"]
+    for gen in range(numGenerations):
+        score = evalGeneration(ndir)
+        
+        if (gen + 1) % islandcon["migrationInterval"] == 0:
+            score = migrate(ndir, score, islandIndex, migrantGenomes, migrantScores, barrier)
+        
+        if gen == numGenerations - 1:
+            bestIndex = torch.argmax(score)
+            bestGenomes[islandIndex] = ndir.grid.genome[bestIndex].cpu()
+            bestScores[islandIndex] = score[bestIndex].cpu()
+        
+        ndir.evoStep(score)
+
+
+def migrate(
+    ndir: NevoDirector,
+    score: torch.Tensor,
+    islandIndex: int,
+    migrantGenomes: torch.Tensor,
+    migrantScores: torch.Tensor,
+    barrier
+) -> torch.Tensor:
+    """
+    Ring migration: send own top members, receive the previous island's into the worst slots\n
+    Returns score with the migrants' scores in their new slots
+    """
+    numIslands, numMigrants = migrantScores.size()
+    
+    # send
+    topIndex = torch.topk(score, numMigrants).indices
+    migrantGenomes[islandIndex] = ndir.grid.getMembers(topIndex).cpu()
+    migrantScores[islandIndex] = score[topIndex].cpu()
+    barrier.wait() # every island sent
+    
+    # receive
+    sourceIndex = (islandIndex - 1) % numIslands
+    worstIndex = torch.topk(score, numMigrants, largest=False).indices
+    ndir.grid.setMembers(worstIndex, migrantGenomes[sourceIndex])
+    score = score.clone()
+    score[worstIndex] = migrantScores[sourceIndex].to(score)
+    barrier.wait() # every island received, buffer free for the next migration
+    
+    return score
@@ -13,13 +13,16 @@ Functionality will be added to later add more layer-depths, keeping complexity s
 import torch
 import copy
 import math
+import os
+import tempfile
 import eco_6.modules.savestate as savestate
 from eco_6.eco_print import EcoPrint
 
 class MultiGrid():
     def __init__(self,
         masterConfig,
-        gconf
+        gconf,
+        rng # RngManager, streams: init, dropout
     ):
         """
         Init means only to set an object\n
@@ -30,8 +33,11 @@ class MultiGrid():
         see multigrid.py for more details
         """
         self.popSize = masterConfig["sim"]["popSize"]
+        self.numEpisodes = masterConfig["sim"]["episodes"]
+        self.rowShape = [self.numEpisodes, 1] if self.numEpisodes > 1 else [1] # rows per member between popSize & neurons
         self.gridcon = masterConfig["grid"]
         self.gconf = gconf
+        self.rng = rng
         self.currVal = -1 # starts as inputs, feeds forward
         
         self.e = EcoPrint()
@@ -40,70 +46,127 @@ class MultiGrid():
         # only for learnable weights and biases, no driver/loop textures (those go in problem driver's Session class)
         self.textureCrate = {}
         
+        # flat genome backing every learnable texture, see buildGenomeLayout()
+        self.genome = None # [popSize, genomeSize]
+        self.genomeLayout = [] # [(label, shape per member, start col, end col), ...]
+        self.genomeSize = 0
+        self.backGenome = None # same size as genome, evolution writes the next generation into it
+        
+        self.plan = None # compiled feed forward plan, see compilePlan()
+        self.runPlan = runPlan # NevoDirector swaps in a torch.compile'd version for grid.engine "compiled"
+        
         # named squash functions
         self.squash = {
             "linear":   lambda x: x,
             "hardtanh22": lambda x: torch.nn.functional.hardtanh(x, -2., 2.),
             "relu6":    lambda x: torch.nn.functional.relu6(x),
-            "argmax":   lambda x: torch.argmax(x, dim=2), # dim=2 stays inside pop member
-            "softmax":  lambda x: torch.softmax(x, dim=2),
+            "argmax":   lambda x: torch.argmax(x, dim=-1), # last dim stays inside pop member (& episode)
+            "softmax":  lambda x: torch.softmax(x, dim=-1),
             
             # lstm types
             "scalar":   lambda x: torch.nn.functional.hardtanh(x, -1., 1.),
             "gate":     lambda x: torch.nn.functional.hardtanh(x, 0., 1.),
         }
+        
+        # in place versions for buffered mode, anything missing (argmax, softmax) falls back to self.squash
+        self.squashInplace = {
+            "linear":   lambda x: x,
+            "hardtanh22": lambda x: torch.nn.functional.hardtanh_(x, -2., 2.),
+            "relu6":    lambda x: torch.nn.functional.relu6(x, inplace=True),
+        }
+        
+        # preallocated activation buffers by layer prefix, only used when gridcon["buffered"]
+        self.buffers = {}
+        
+        # member subset feed forward runs on, see compactMembers()
+        self.memberIndex = None # [numActive] original member indices, None = whole population
+        self.activeCrate = None # genome views, lstm memory & dropmasks of the active members only
+        self.compactGenome = None # scratch [popSize, genomeSize], active rows get selected into the front
+        self.compactMemory = {} # scratch lstm memory by label, same layout
+        self.memberOutput = None # [popSize, ...] whole population output while compacted
+        
+        # chunked execution, see feedForwardChunked()
+        self.chunkcon = self.gridcon["chunked"]
+        self.chunkDevice = None if self.chunkcon["device"] is None else torch.device(self.chunkcon["device"])
+        self.chunkSize = 0 # members per chunk, planned on first use, see planChunkSize()
+        self.chunkGenome = None # compute device scratch [chunkSize, genomeSize], a chunk's genome rows get copied in
+        self.chunkMemory = {} # compute device scratch lstm memory by label [chunkSize, 1, height]
+        self.chunkBuffers = {} # compute device activation buffers by layer prefix, buffered mode
+        self.chunkPlans = {} # plans bound to the chunk scratch by chunk member count
+        self.chunkOutput = None # [numActive, ...] host output, reused
+        if (self.chunkDevice is not None) and (self.gconf["device"].type != "cpu"):
+            self.e.errorize(f"MultiGrid.__init__() chunked keeps the population on the host, director device should be cpu, is {self.gconf["device"]}\n")
+        
+        # mixed precision, see refreshShadow()
+        self.computeDtype = self.gconf["dtype"] # feed forward dtype, lstm memory & activations live in it
+        self.shadowGenome = None # [popSize, genomeSize] computeDtype copy of the genome feed forward runs on
+        self.shadowCrate = None # genome views into shadowGenome, lstm memory & computeDtype dropmasks
+        self.shadowStale = True # genome written since the last refreshShadow()
+        if masterConfig["sim"]["allowHalfPrecision"]:
+            halfDtypes = {"bfloat16": torch.bfloat16, "float16": torch.float16}
+            if masterConfig["sim"]["halfPrecisionDtype"] in halfDtypes: self.computeDtype = halfDtypes[masterConfig["sim"]["halfPrecisionDtype"]]
+            else: self.e.errorize(f"MultiGrid.__init__() unknown sim halfPrecisionDtype: {masterConfig["sim"]["halfPrecisionDtype"]}, using {self.computeDtype}\n")
 
 
     # -------- GRID CREATION, FEEDING --------
-    def createGrid(self):
+    def createGrid(self, memberSeeds: torch.Tensor = None):
         """
         Create a new grid, textures go in self.textureCrate[<prefix_type_weight/bias>]
         all textures are 3d
-        ex. 0_dense_weights, act_dense_bias, 1_lstm_xt_weights, ...
+        ex. 0_dense_weights, act_dense_bias, 1_lstm_xt_weights, ...\n
+        memberSeeds [popSize] (evo.encoding "seeds"): every member's genome row comes from its own seed
         """
         # errorize
         if len(self.gridcon["layers"]) == 0: print("config.json5 was given 0 layers to build network with")
         
-        priorHeight = self.gridcon["featureInputLength"]
+        # all learnable weights & biases live in one flat genome, crate entries are views into it
+        self.buildGenomeLayout()
+        self.bindGenome(self.allocateHost([self.popSize, self.genomeSize]))
+        
         for li, layer in enumerate(self.gridcon["layers"]):
             prefix = self.getLayerPrefix(li)
             
             # -------------------- DENSE --------------------
             if not layer["memory"]:
-                
-                self.textureCrate[f"{prefix}_dense_weight"] = torch.randn( # weights
-                    [self.popSize, priorHeight, layer["height"]], **self.gconf
-                )
-                self.textureCrate[f"{prefix}_dense_bias"] = torch.zeros( # biases
-                    [self.popSize, 1, layer["height"]], **self.gconf
-                )
-                
+                self.textureCrate[f"{prefix}_dense_weight"].normal_(generator=self.rng["init"]) # weights
+                self.textureCrate[f"{prefix}_dense_bias"].zero_() # biases
                 
             # -------------------- LSTM --------------------
             elif layer["memory"] == "lstm":
-                self.textureCrate[f"{prefix}_lstm_short_mem"] = torch.zeros( # short memory
-                    [self.popSize, 1, layer["height"]], **self.gconf
-                )
-                self.textureCrate[f"{prefix}_lstm_long_mem"] = torch.zeros( # long memory
-                    [self.popSize, 1, layer["height"]], **self.gconf
-                )
-                
-                self.textureCrate[f"{prefix}_lstm_xt_weights"] = torch.randn( # xt weights / prev layer
-                    [self.popSize, priorHeight, layer["height"] * 4], **self.gconf
-                )
-                self.textureCrate[f"{prefix}_lstm_sm_weights"] = torch.randn( # short mem weights
-                    [self.popSize, 4, layer["height"]], **self.gconf
-                )
-                
-                self.textureCrate[f"{prefix}_lstm_bias"] = torch.zeros( # biases
-                    [self.popSize, 4, layer["height"]], **self.gconf
-                )
-                
-            priorHeight = layer["height"]
+                self.textureCrate[f"{prefix}_lstm_xt_weights"].normal_(generator=self.rng["init"]) # xt weights / prev layer
+                self.textureCrate[f"{prefix}_lstm_sm_weights"].normal_(generator=self.rng["init"]) # short mem weights
+                self.textureCrate[f"{prefix}_lstm_bias"].zero_() # biases
             
+        self.createMemory()
+        
+        # -------------------- SEEDED --------------------
+        if memberSeeds is not None: self.initMembers(memberSeeds)
+        
         # -------------------- DROPOUT --------------------
         # dropout masks exist in texture crate now
         if 1.0 > self.gridcon["dropout"] > 0.0: self.refreshDropoutMask()
+        
+        self.compilePlan()
+    
+    def initMembers(self, memberSeeds: torch.Tensor):
+        """Regenerate every member's genome row from its seed: weights normal, biases zero (like createGrid)"""
+        biasSpans = [(start, end) for label, shape, start, end in self.genomeLayout if label.endswith("_bias")]
+        for member, seed in enumerate(memberSeeds.tolist()):
+            generator = torch.Generator(device=self.gconf["device"]).manual_seed(seed)
+            self.genome[member].normal_(generator=generator)
+            for start, end in biasSpans: self.genome[member, start:end].zero_()
+        self.invalidateShadow()
+    
+    def createMemory(self):
+        """
+        Allocate every lstm layer's short & long memory zeroed, [popSize, *rowShape, height] in computeDtype
+        (per episode), memory is run state so it's never taken from a file
+        """
+        for li, layer in enumerate(self.gridcon["layers"]):
+            prefix = self.getLayerPrefix(li)
+            if layer["memory"] == "lstm":
+                for label in [f"{prefix}_lstm_short_mem", f"{prefix}_lstm_long_mem"]:
+                    self.textureCrate[label] = self.allocateHost([self.popSize, *self.rowShape, layer["height"]], self.computeDtype).zero_()
     
     def resetMemory(self):
         """
@@ -115,6 +178,9 @@ class MultiGrid():
             if layer["memory"] == "lstm":
                 self.textureCrate[f"{prefix}_lstm_short_mem"][:] = 0
                 self.textureCrate[f"{prefix}_lstm_long_mem"][:] = 0
+                if self.activeCrate is not None:
+                    self.activeCrate[f"{prefix}_lstm_short_mem"][:] = 0
+                    self.activeCrate[f"{prefix}_lstm_long_mem"][:] = 0
     
     def refreshDropoutMask(self):
         """
@@ -135,9 +201,12 @@ class MultiGrid():
             mult = 1.0 / (1.0 - (actualDropped / layer["height"])) # grab actual droprate based on actual
             # normal formula is 1 / (1 - droprate)
             
-            res = torch.randperm(layer["height"], **self.gconf)
+            res = torch.randperm(layer["height"], generator=self.rng["dropout"], **self.gconf)
             res = torch.where(res < actualDropped, 0.0, mult)
             self.textureCrate[f"{prefix}_dropmask"] = res
+        
+        self.invalidatePlan()
+        self.invalidateShadow()
 
     def checkFeatureShape(self, tensor):
         """
@@ -147,7 +216,8 @@ class MultiGrid():
         OR:\n
         3d size=[popSize, 1, featureLengthInput]\n
         Use 1d if the same information is being distributed to all members every ts step\n
-        Use 3d if each member has a totally separate information in tracking, such as the polecart test
+        Use 3d if each member has a totally separate information in tracking, such as the polecart test\n
+        sim["episodes"] > 1: 3d becomes 4d size=[popSize, episodes, 1, featureLengthInput]
         """
         # check dimensions
         if len(tensor.size()) == 1:
@@ -161,10 +231,10 @@ class MultiGrid():
                 self.e.errorize("MultiGrid.setFeatures() 1d ran into wrong size")
                 self.e.errorize(f"size given={tensor.size()[0]} -- featureInputLength={self.gridcon["featureInputLength"]}\n")
             
-        elif len(tensor.size()) == 3:
+        elif len(tensor.size()) == len(self.rowShape) + 2:
             
-            # 3d, need to check dim1 is flat and dim0==self.popSize and dim2==feature length
-            sizeReq = torch.Size([self.popSize, 1, self.gridcon["featureInputLength"]])
+            # 3d (4d episodes), need to check rows and dim0==self.popSize and last dim==feature length
+            sizeReq = torch.Size([self.popSize, *self.rowShape, self.gridcon["featureInputLength"]])
             if tensor.size() == sizeReq:
                 # passes
                 self.currVal = tensor
@@ -176,78 +246,524 @@ class MultiGrid():
         else:
             
             # err
-            self.e.errorize(f"MultiGrid.setFeatures() ran into false dimensionality: num dim={len(tensor.size())} -- must be 1 or 3")
+            self.e.errorize(f"MultiGrid.setFeatures() ran into false dimensionality: num dim={len(tensor.size())} -- must be 1 or {len(self.rowShape) + 2}")
 
     def getRequiredFeatureShape(self):
         """Return required 1d or 3d size for feature sizes"""
         print(f"getRequiredFeatureShape():")
         print(f"\t1d: [{self.gridcon["featureInputLength"]}] (broadcasted, similar features for all)")
-        print(f"\t3d: [{self.popSize}, 1, {self.gridcon["featureInputLength"]}] (different input features for any)")
+        print(f"\t{len(self.rowShape) + 2}d: [{self.popSize}, {", ".join(str(rows) for rows in self.rowShape)}, {self.gridcon["featureInputLength"]}] (different input features for any)")
 
-    def feedForward(self, inference: bool):
-        """inference True: live/validation, False: training && dropout rate"""
-        dropoutApplicable = (self.gridcon["dropout"] > 0.0) and (inference == False)
+    def compilePlan(self):
+        """
+        Resolve every layer's textures & squash functions once into a flat execution plan\n
+        self.plan = [(step function, (bound textures ...)), ...] in layer order\n
+        feedForward() then only walks the list: no f-string keys, getLayerPrefix(), crate lookups
+        or memory branching per timestep\n
+        gets rebuilt on the next feedForward() after invalidatePlan(), which is called whenever
+        textures are replaced (bindGenome, overwriteGrid, importGrid, dropout refresh, half precision
+        shadow refresh, compactMembers & expandMembers), in place genome writes keep the plan valid\n
+        chunked: the plan is the one bound to the compute device chunk scratch, see feedForwardChunked()
+        """
+        numActive = self.getActiveCount()
+        if self.chunkDevice is not None:
+            self.allocateChunks()
+            self.plan = self.getChunkPlan(min(self.chunkSize, numActive))
+            return
         
+        # compacted: plan runs on the active members' textures, buffers sliced to their count
+        buffers = None
+        if self.gridcon["buffered"]:
+            self.allocateBuffers(self.buffers, self.popSize, self.gconf["device"])
+            buffers = {prefix: buffer[:numActive] for prefix, buffer in self.buffers.items()}
+        self.plan = self.buildPlan(self.getComputeCrate() if self.memberIndex is None else self.activeCrate, buffers)
+    
+    def buildPlan(self, crate: dict, buffers: dict = None) -> list:
+        """
+        Bind every layer's textures out of crate (whole population, active members or a chunk)
+        into plan steps, buffers: activation buffers by prefix for buffered mode, None = unbuffered\n
+        sim["episodes"] > 1: weights & biases bound as [members, 1, ...] views that broadcast over the episodes
+        """
+        if self.numEpisodes > 1: crate = {label: texture.unsqueeze(1) if label in self.genomeLabels else texture for label, texture in crate.items()}
+        plan = []
         for li, layer in enumerate(self.gridcon["layers"]):
             prefix = self.getLayerPrefix(li)
+            dropmask = crate.get(f"{prefix}_dropmask") # only exists with dropout
             
             # -------------------- DENSE --------------------
             if not layer["memory"]:
-                # matmul and reshape (since it auto flattens)
-                self.currVal @= self.textureCrate[f"{prefix}_dense_weight"]
-                self.currVal = torch.reshape(self.currVal, [self.popSize, 1, -1])
-                
-                # bias
-                self.currVal += self.textureCrate[f"{prefix}_dense_bias"]
-                
-                # dropout
-                if dropoutApplicable:
-                    self.currVal *= self.textureCrate[f"{prefix}_dropmask"]
-                
-                # squash
-                thisActivation = layer["squash"]
-                self.currVal = self.squash[thisActivation](self.currVal)
-                
+                textures = (
+                    crate[f"{prefix}_dense_weight"],
+                    crate[f"{prefix}_dense_bias"],
+                    dropmask
+                )
+                if buffers is not None:
+                    squashFn = self.squashInplace.get(layer["squash"], self.squash[layer["squash"]])
+                    plan.append((denseStepBuffered, (*textures, squashFn, buffers[prefix])))
+                else:
+                    plan.append((denseStep, (*textures, self.squash[layer["squash"]])))
+            
             # -------------------- LSTM --------------------
             elif layer["memory"] == "lstm":
-                # xt matmul & reshape
-                self.currVal @= self.textureCrate[f"{prefix}_lstm_xt_weights"]
-                self.currVal = torch.reshape(self.currVal, [self.popSize, 4, -1])
-                
-                # short mem repeat, element mult
-                tempVal = self.textureCrate[f"{prefix}_lstm_short_mem"]
-                tempVal = tempVal.repeat(1, 4, 1)
-                tempVal *= self.textureCrate[f"{prefix}_lstm_sm_weights"]
-                
-                # add bias & short mem
-                self.currVal += self.textureCrate[f"{prefix}_lstm_bias"]
-                self.currVal += tempVal
-                
-                # squash gate (relu1), scalar (hardtanh11)
-                self.currVal[:, 0:3, :] = self.squash["gate"](self.currVal[:, 0:3, :]) # domain y-dim:[0, 3)
-                self.currVal[:, 3, :] = self.squash["scalar"](self.currVal[:, 3, :]) # domain y-dim:[3]
-                
-                # long mem
-                self.textureCrate[f"{prefix}_lstm_long_mem"] *= self.currVal[:, 0:1, :] # forget
-                self.currVal[:, 1, :] *= self.currVal[:, 3, :] # input mult
-                self.textureCrate[f"{prefix}_lstm_long_mem"] += self.currVal[:, 1:2, :] # input to long
-                
-                # reassign short mem
-                self.textureCrate[f"{prefix}_lstm_short_mem"] = self.textureCrate[f"{prefix}_lstm_long_mem"]
-                
-                # apply dropout here
-                if dropoutApplicable:
-                    self.textureCrate[f"{prefix}_lstm_short_mem"] *= self.textureCrate[f"{prefix}_dropmask"]
-                
-                # output scalar squash & mult
-                self.textureCrate[f"{prefix}_lstm_short_mem"] = \
-                    self.squash["scalar"](self.textureCrate[f"{prefix}_lstm_short_mem"]) # output squash
-                self.textureCrate[f"{prefix}_lstm_short_mem"] *= self.currVal[:, 2:3, :] # mult
-                
-                # store to next layer
-                self.currVal = self.textureCrate[f"{prefix}_lstm_short_mem"]
+                textures = (
+                    crate[f"{prefix}_lstm_xt_weights"],
+                    crate[f"{prefix}_lstm_sm_weights"],
+                    crate[f"{prefix}_lstm_bias"],
+                    dropmask,
+                    crate[f"{prefix}_lstm_short_mem"],
+                    crate[f"{prefix}_lstm_long_mem"]
+                )
+                if buffers is not None: plan.append((lstmStepBuffered, (*textures, buffers[prefix])))
+                else: plan.append((lstmStep, textures))
             
-            else: print(f"grid.feedForward() ran into invalid layer memory type: {layer["memory"]}")
+            else: print(f"grid.compilePlan() ran into invalid layer memory type: {layer["memory"]}")
+        return plan
+    
+    def allocateBuffers(self, buffers: dict, numRows: int, device):
+        """
+        Preallocate per layer activation buffers for buffered mode into buffers, sized from gridcon["layers"]
+        & numRows (popSize, or chunkSize on the compute device)\n
+        dense: output [numRows, 1, height], lstm: gates [numRows, 1, height * 4] (output is short mem),
+        [numRows, episodes, 1, ...] with sim["episodes"] > 1\n
+        kept across plan rebuilds, only reallocated if a size changes
+        """
+        for li, layer in enumerate(self.gridcon["layers"]):
+            prefix = self.getLayerPrefix(li)
+            width = layer["height"] * 4 if layer["memory"] == "lstm" else layer["height"]
+            size = torch.Size([numRows, *self.rowShape, width])
+            
+            if (prefix not in buffers) or (buffers[prefix].size() != size) or (buffers[prefix].device != device):
+                buffers[prefix] = torch.empty(size, dtype=self.computeDtype, device=device)
+    
+    def invalidatePlan(self):
+        """Drop the compiled plan, next feedForward() rebuilds it from the current textureCrate"""
+        self.plan = None
+        self.chunkPlans = {}
+    
+    def feedForward(self, inference: bool):
+        """
+        inference True: live/validation, False: training && dropout rate\n
+        with gridcon["buffered"] the output is a reused buffer (compacted & chunked included), the next
+        call overwrites it, copy it if it has to outlive that; unbuffered every call returns a fresh tensor\n
+        compacted (see compactMembers()) only the active members run, output is still [popSize, ...]\n
+        chunked (see feedForwardChunked()) the output lives on the host\n
+        half precision (see refreshShadow()) features go in & the output comes back in the genome's dtype
+        """
+        if self.shadowStale: self.refreshShadow()
+        if self.plan is None: self.compilePlan()
+        dropoutApplicable = (self.gridcon["dropout"] > 0.0) and (inference == False)
+        
+        # 1d broadcast features as a [1, 1, feat] batch so every matmul lands on [popSize, 1, height] (episodes as an expand view)
+        if len(self.currVal.size()) == 1: self.currVal = self.currVal.view([1, 1, -1]).expand([1, *self.rowShape, -1])
+        self.currVal = self.currVal.to(self.computeDtype)
+        
+        # compacted: only the active members' features go in
+        if (self.memberIndex is not None) and (self.currVal.size()[0] == self.popSize):
+            self.currVal = self.currVal.index_select(0, self.memberIndex)
+        
+        if self.chunkDevice is None: self.currVal = self.runPlan(self.currVal, dropoutApplicable, self.plan)
+        else: self.currVal = self.feedForwardChunked(self.currVal, dropoutApplicable)
+        
+        # compacted: outputs back into their own rows
+        if self.memberIndex is not None: self.currVal = self.scatterOutput(self.currVal)
+        if self.currVal.is_floating_point(): self.currVal = self.currVal.to(self.gconf["dtype"])
+    
+    def checkSequenceShape(self, tensor) -> bool:
+        """
+        Check a whole feature timeline for open-loop sequence mode\n
+        Tensor MUST either be:\n
+        2d size=[numTimesteps, featureInputLength] (broadcast to all members)\n
+        OR:\n
+        3d size=[numTimesteps, popSize, featureInputLength]
+        """
+        featLength = self.gridcon["featureInputLength"]
+
+        if len(tensor.size()) == 2 and tensor.size()[1] == featLength: return True
+        if len(tensor.size()) == 3 and tensor.size()[1:] == torch.Size([self.popSize, featLength]): return True
+
+        # err
+        self.e.errorize("MultiGrid.checkSequenceShape() ran into wrong size")
+        self.e.errorize(f"size given={tensor.size()} -- size needed=[numTimesteps, {featLength}] or [numTimesteps, {self.popSize}, {featLength}]\n")
+        return False
+
+    def feedForwardSequence(self, featureSequence: torch.Tensor, inference: bool) -> torch.Tensor:
+        """
+        Open-loop feed forward of a whole known feature timeline\n
+        featureSequence: [numTimesteps, featureInputLength] or [numTimesteps, popSize, featureInputLength]\n
+        runs layer by layer with timesteps riding in dim 1, so every dense layer and every lstm
+        xt projection is a single [popSize, numTimesteps, prior] @ [popSize, prior, height] matmul,
+        only the elementwise lstm gate/memory update stays inside the timestep loop\n
+        compacted (see compactMembers()) only the active members' timelines run, inactive rows output 0\n
+        Returns [numTimesteps, popSize, actions], same as stacking numTimesteps feedForward() calls
+        """
+        if self.numEpisodes > 1:
+            self.e.errorize("MultiGrid.feedForwardSequence() timelines are open loop, sim episodes has to be 1\n")
+            return None
+        dropoutApplicable = (self.gridcon["dropout"] > 0.0) and (inference == False)
+        
+        # timesteps into dim 1: [popSize, numTimesteps, feat], 2d broadcasts as [1, numTimesteps, feat]
+        if len(featureSequence.size()) == 2: self.currVal = featureSequence.unsqueeze(0)
+        else: self.currVal = featureSequence.transpose(0, 1)
+        self.currVal = self.currVal.to(self.computeDtype)
+        
+        # compacted: only the active members' timelines go in
+        if (self.memberIndex is not None) and (self.currVal.size()[0] == self.popSize):
+            self.currVal = self.currVal.index_select(0, self.memberIndex)
+        
+        if self.shadowStale: self.refreshShadow()
+        if self.plan is None: self.compilePlan()
+        if self.chunkDevice is None: self.currVal = runSequence(self.currVal, dropoutApplicable, self.plan)
+        else:
+            # chunked: every chunk is copied in once & runs the whole timeline
+            genome, crate = self.getRunSource()
+            numActive = genome.size()[0]
+            output = None
+            for chunkStart in range(0, numActive, self.chunkSize):
+                chunkEnd = min(chunkStart + self.chunkSize, numActive)
+                plan = self.loadChunk(genome, crate, chunkStart, chunkEnd)
+                chunkFeatures = self.currVal if self.currVal.size()[0] == 1 else self.currVal[chunkStart:chunkEnd]
+                chunkOutput = runSequence(chunkFeatures.to(self.chunkDevice, non_blocking=True), dropoutApplicable, plan)
+                if output is None: output = torch.empty([numActive, *chunkOutput.size()[1:]], dtype=chunkOutput.dtype, device=self.gconf["device"])
+                output[chunkStart:chunkEnd] = chunkOutput
+                self.storeChunk(crate, chunkStart, chunkEnd)
+            self.currVal = output
+        
+        # compacted: outputs back into their own rows
+        if self.memberIndex is not None: self.currVal = self.scatterOutput(self.currVal, reuse=False)
+        
+        # back to timestep major: [numTimesteps, popSize, actions]
+        self.currVal = self.currVal.transpose(0, 1)
+        if self.currVal.is_floating_point(): self.currVal = self.currVal.to(self.gconf["dtype"])
+        return self.currVal
+
+    # -------- MEMBER SUBSET --------
+    def compactMembers(self, memberIndex: torch.Tensor):
+        """
+        Run feed forward on only the given members until expandMembers()\n
+        memberIndex: [numActive] original member indices or a bool mask [popSize]\n
+        their genome rows & lstm memory get index_selected into the front of preallocated scratch
+        textures, so every matmul runs numActive rows instead of popSize\n
+        feedForward() still takes & returns whole population tensors, inactive rows output 0\n
+        genome changes while compacted aren't seen, evolution expands first
+        """
+        if memberIndex.dtype == torch.bool: memberIndex = memberIndex.nonzero().view([-1])
+        memberIndex = memberIndex.to(self.gconf["device"]).sort().values
+        self.expandMembers() # memory of the previous subset back into the population first
+        numActive = memberIndex.numel()
+        
+        # scratch, allocated once, active members always land in the first numActive rows
+        genome = self.getComputeGenome()
+        if (self.compactGenome is None) or (self.compactGenome.size() != genome.size()) or (self.compactGenome.dtype != genome.dtype):
+            self.compactGenome = torch.empty_like(genome)
+        compact = torch.index_select(genome, 0, memberIndex, out=self.compactGenome[:numActive])
+        
+        self.activeCrate = {
+            label: compact[:, start:end].view([numActive, *shape])
+            for label, shape, start, end in self.genomeLayout
+        }
+        for label, texture in self.getComputeCrate().items():
+            if label.endswith("_mem"):
+                if (label not in self.compactMemory) or (self.compactMemory[label].size() != texture.size()):
+                    self.compactMemory[label] = torch.empty_like(texture)
+                self.activeCrate[label] = torch.index_select(texture, 0, memberIndex, out=self.compactMemory[label][:numActive])
+            elif label.endswith("_dropmask"): self.activeCrate[label] = texture # universal for all members
+        
+        self.memberIndex = memberIndex
+        if self.memberOutput is not None: self.memberOutput.zero_()
+        self.invalidatePlan()
+    
+    def expandMembers(self):
+        """Back to the whole population, active members' lstm memory gets copied back into their rows"""
+        if self.memberIndex is None: return
+        for label, texture in self.textureCrate.items():
+            if label.endswith("_mem"): texture.index_copy_(0, self.memberIndex, self.activeCrate[label])
+        
+        self.memberIndex = None
+        self.activeCrate = None
+        self.invalidatePlan()
+    
+    def getActiveCount(self) -> int:
+        """Number of members feed forward runs on"""
+        return self.popSize if self.memberIndex is None else self.memberIndex.numel()
+    
+    def getActiveMask(self) -> torch.Tensor:
+        """bool [popSize], True for the members feed forward runs on"""
+        if self.memberIndex is None: return torch.ones([self.popSize], dtype=torch.bool, device=self.gconf["device"])
+        mask = torch.zeros([self.popSize], dtype=torch.bool, device=self.gconf["device"])
+        mask[self.memberIndex] = True
+        return mask
+    
+    def scatterOutput(self, output: torch.Tensor, reuse: bool = None) -> torch.Tensor:
+        """
+        Compacted output [numActive, ...] into a whole population output [popSize, ...], inactive rows 0\n
+        reuse (default gridcon["buffered"]): scatter into the reused self.memberOutput, else a fresh tensor
+        """
+        size = torch.Size([self.popSize, *output.size()[1:]])
+        if reuse is None: reuse = self.gridcon["buffered"]
+        if not reuse: return output.new_zeros(size).index_copy_(0, self.memberIndex, output)
+        if (self.memberOutput is None) or (self.memberOutput.size() != size) or (self.memberOutput.dtype != output.dtype):
+            self.memberOutput = torch.zeros(size, dtype=output.dtype, device=output.device)
+        return self.memberOutput.index_copy_(0, self.memberIndex, output)
+    
+    
+    # -------- CHUNKED --------
+    def allocateHost(self, size: list, dtype = None) -> torch.Tensor:
+        """
+        Uninitialized population sized texture on the director's device, dtype default the genome's\n
+        chunked keeps these on the host, grid["chunked"]["host"]: "pageable", "pinned" (page-locked,
+        async copies to a cuda compute device) or "mmap" (file backed in chunked mmapDir, the os pages it)
+        """
+        dtype = dtype or self.gconf["dtype"]
+        if self.chunkDevice is None: return torch.empty(size, dtype=dtype, device=self.gconf["device"])
+        
+        host = self.chunkcon["host"]
+        if host == "pinned" and self.chunkDevice.type == "cuda": return torch.empty(size, dtype=dtype, pin_memory=True)
+        if host == "mmap":
+            handle, path = tempfile.mkstemp(suffix=".mmap", dir=self.chunkcon["mmapDir"] or None)
+            os.close(handle)
+            texture = torch.from_file(path, shared=True, size=math.prod(size), dtype=dtype).view(size)
+            try: os.remove(path) # stays mapped, gone once unmapped (posix)
+            except OSError: pass
+            return texture
+        return torch.empty(size, dtype=dtype, device=self.gconf["device"])
+    
+    def planChunkSize(self) -> int:
+        """
+        Members per chunk: grid["chunked"]["chunkSize"], or 0 = as many as fit into memoryFraction of
+        the compute device's free memory (genome row, lstm memory & activations per member)
+        """
+        if self.chunkcon["chunkSize"] > 0: return min(self.chunkcon["chunkSize"], self.popSize)
+        
+        elementSize = torch.empty([], dtype=self.computeDtype).element_size()
+        widths = [self.gridcon["featureInputLength"]]
+        memoryWidth = 0
+        for layer in self.gridcon["layers"]:
+            widths.append(layer["height"] * 4 if layer["memory"] == "lstm" else layer["height"])
+            if layer["memory"] == "lstm": memoryWidth += layer["height"] * 2
+        memberBytes = (self.genomeSize + (memoryWidth + 3 * max(widths)) * self.numEpisodes) * elementSize # in, gates & out activations
+        
+        if self.chunkDevice.type == "cuda": freeBytes = torch.cuda.mem_get_info(self.chunkDevice)[0]
+        else:
+            try: freeBytes = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+            except (AttributeError, ValueError, OSError):
+                self.e.warn("MultiGrid.planChunkSize() can't read free memory here, set grid chunked chunkSize\n")
+                return self.popSize
+        return max(1, min(self.popSize, int(freeBytes * self.chunkcon["memoryFraction"]) // memberBytes))
+    
+    def allocateChunks(self):
+        """Compute device scratch a chunk gets copied into, allocated once per chunk size"""
+        if self.chunkSize == 0:
+            self.chunkSize = self.planChunkSize()
+            self.e.info(f"grid chunked: {math.ceil(self.popSize / self.chunkSize)} chunks of {self.chunkSize} members on {self.chunkDevice}\n")
+        
+        size = torch.Size([self.chunkSize, self.genomeSize])
+        if (self.chunkGenome is None) or (self.chunkGenome.size() != size):
+            self.chunkGenome = torch.empty(size, dtype=self.computeDtype, device=self.chunkDevice)
+        for label, texture in self.textureCrate.items():
+            if label.endswith("_mem") and (label not in self.chunkMemory):
+                self.chunkMemory[label] = torch.empty([self.chunkSize, *texture.size()[1:]], dtype=self.computeDtype, device=self.chunkDevice)
+        if self.gridcon["buffered"]: self.allocateBuffers(self.chunkBuffers, self.chunkSize, self.chunkDevice)
+    
+    def getChunkPlan(self, numMembers: int) -> list:
+        """Plan bound to the first numMembers rows of the chunk scratch (full chunks & the last partial one)"""
+        if numMembers in self.chunkPlans: return self.chunkPlans[numMembers]
+        
+        crate = {
+            label: self.chunkGenome[:numMembers, start:end].view([numMembers, *shape])
+            for label, shape, start, end in self.genomeLayout
+        }
+        for label, memory in self.chunkMemory.items(): crate[label] = memory[:numMembers]
+        for label, texture in self.getComputeCrate().items():
+            if label.endswith("_dropmask"): crate[label] = texture.to(self.chunkDevice)
+        
+        buffers = {prefix: buffer[:numMembers] for prefix, buffer in self.chunkBuffers.items()} if self.gridcon["buffered"] else None
+        self.chunkPlans[numMembers] = self.buildPlan(crate, buffers)
+        return self.chunkPlans[numMembers]
+    
+    def getRunSource(self) -> tuple[torch.Tensor, dict]:
+        """Host genome rows & crate feed forward runs on: whole population or the compacted active members"""
+        if self.memberIndex is None: return self.getComputeGenome(), self.getComputeCrate()
+        return self.compactGenome[:self.memberIndex.numel()], self.activeCrate
+    
+    def loadChunk(self, genome: torch.Tensor, crate: dict, start: int, end: int) -> list:
+        """Copy member rows [start:end] (genome & lstm memory) into the chunk scratch, returns its plan"""
+        numMembers = end - start
+        self.chunkGenome[:numMembers].copy_(genome[start:end], non_blocking=True)
+        for label, memory in self.chunkMemory.items(): memory[:numMembers].copy_(crate[label][start:end], non_blocking=True)
+        return self.getChunkPlan(numMembers)
+    
+    def storeChunk(self, crate: dict, start: int, end: int):
+        """Page the chunk's lstm memory back into member rows [start:end] on the host"""
+        for label, memory in self.chunkMemory.items(): crate[label][start:end].copy_(memory[:end - start])
+    
+    def feedForwardChunked(self, features: torch.Tensor, dropoutApplicable: bool) -> torch.Tensor:
+        """
+        One timestep with the population on the host (grid["chunked"]) streamed through the compute
+        device chunkSize members at a time: genome rows & lstm memory in, plan, memory & output back\n
+        features: [numActive or 1, 1, feat] host, returns [numActive, ...] host
+        (reused buffer with gridcon["buffered"], fresh otherwise)
+        """
+        genome, crate = self.getRunSource()
+        numActive = genome.size()[0]
+        for start in range(0, numActive, self.chunkSize):
+            end = min(start + self.chunkSize, numActive)
+            plan = self.loadChunk(genome, crate, start, end)
+            chunkFeatures = features if features.size()[0] == 1 else features[start:end]
+            output = self.runPlan(chunkFeatures.to(self.chunkDevice, non_blocking=True), dropoutApplicable, plan)
+            
+            size = torch.Size([numActive, *output.size()[1:]])
+            if start == 0 and not self.gridcon["buffered"]: self.chunkOutput = None # unbuffered callers may keep the last output
+            if (self.chunkOutput is None) or (self.chunkOutput.size() != size) or (self.chunkOutput.dtype != output.dtype):
+                self.chunkOutput = torch.empty(size, dtype=output.dtype, device=self.gconf["device"])
+            self.chunkOutput[start:end] = output
+            self.storeChunk(crate, start, end)
+        return self.chunkOutput
+    
+    
+    # -------- MIXED PRECISION --------
+    def getComputeGenome(self) -> torch.Tensor:
+        """Genome feed forward runs on: the genome itself, or its half precision shadow"""
+        if self.computeDtype == self.gconf["dtype"]: return self.genome
+        if self.shadowStale: self.refreshShadow()
+        return self.shadowGenome
+    
+    def getComputeCrate(self) -> dict:
+        """Crate feed forward runs on: textureCrate itself, or the half precision shadowCrate"""
+        if self.computeDtype == self.gconf["dtype"]: return self.textureCrate
+        if self.shadowStale: self.refreshShadow()
+        return self.shadowCrate
+    
+    def invalidateShadow(self):
+        """Genome got written, next feed forward refreshes the half precision shadow first"""
+        self.shadowStale = True
+    
+    def refreshShadow(self):
+        """
+        sim["allowHalfPrecision"]: evolution keeps the full precision genome (small fork nudges would
+        round away in bf16), feed forward runs on a sim["halfPrecisionDtype"] shadow of it\n
+        one cast copy per refresh, the first feed forward after every evoStep (or any other genome write)
+        """
+        self.shadowStale = False
+        if self.computeDtype == self.gconf["dtype"]: return
+        
+        if (self.shadowGenome is None) or (self.shadowGenome.size() != self.genome.size()):
+            self.shadowGenome = self.allocateHost(self.genome.size(), self.computeDtype)
+        self.shadowGenome.copy_(self.genome)
+        
+        self.shadowCrate = {
+            label: self.shadowGenome[:, start:end].view([self.popSize, *shape])
+            for label, shape, start, end in self.genomeLayout
+        }
+        for label, texture in self.textureCrate.items():
+            if label.endswith("_mem"):
+                if texture.dtype != self.computeDtype: self.textureCrate[label] = texture.to(self.computeDtype) # imported crate
+                self.shadowCrate[label] = self.textureCrate[label]
+            elif label.endswith("_dropmask"): self.shadowCrate[label] = texture.to(self.computeDtype)
+        self.invalidatePlan()
+    
+    
+    # -------- GENOME --------
+    def buildGenomeLayout(self):
+        """
+        Lay out every learnable weight & bias texture as a column range of one flat genome\n
+        genome [popSize, genomeSize], member rows are contiguous, layers in order:
+        dense: weight [prior, height], bias [1, height]\n
+        lstm: xt weights [prior, height * 4], sm weights [4, height], bias [4, height]
+        """
+        self.genomeLayout = []
+        start = 0
+        priorHeight = self.gridcon["featureInputLength"]
+        for li, layer in enumerate(self.gridcon["layers"]):
+            prefix = self.getLayerPrefix(li)
+            
+            if not layer["memory"]:
+                shapes = {
+                    f"{prefix}_dense_weight": [priorHeight, layer["height"]],
+                    f"{prefix}_dense_bias": [1, layer["height"]],
+                }
+            elif layer["memory"] == "lstm":
+                shapes = {
+                    f"{prefix}_lstm_xt_weights": [priorHeight, layer["height"] * 4],
+                    f"{prefix}_lstm_sm_weights": [4, layer["height"]],
+                    f"{prefix}_lstm_bias": [4, layer["height"]],
+                }
+            
+            for label, shape in shapes.items():
+                end = start + math.prod(shape)
+                self.genomeLayout.append((label, shape, start, end))
+                start = end
+            priorHeight = layer["height"]
+        
+        self.genomeSize = start
+        self.genomeLabels = {label for label, shape, start, end in self.genomeLayout}
+    
+    def bindGenome(self, genome: torch.Tensor):
+        """Set the flat genome [popSize, genomeSize] and point every learnable crate entry at its view"""
+        self.genome = genome
+        for label, shape, start, end in self.genomeLayout:
+            self.textureCrate[label] = genome[:, start:end].view([self.popSize, *shape])
+        self.invalidatePlan()
+        self.invalidateShadow()
+    
+    def packGenome(self):
+        """
+        Copy standalone learnable textures (imported/overwritten crate) into a fresh flat genome,
+        crate entries become views into it
+        """
+        self.buildGenomeLayout()
+        genome = self.allocateHost([self.popSize, self.genomeSize])
+        for label, shape, start, end in self.genomeLayout:
+            genome[:, start:end] = self.textureCrate[label].reshape([self.popSize, -1])
+        self.bindGenome(genome)
+    
+    def getGenomeSpans(self, layerPrefixes: list) -> list[tuple[int, int]]:
+        """
+        Return genome column ranges [(start, end), ...] covering every texture of the given layers,
+        neighbouring layers merged into one range
+        """
+        prefixes = [f"{prefix}_" for prefix in layerPrefixes]
+        spans = []
+        for label, shape, start, end in self.genomeLayout:
+            if not any(label.startswith(prefix) for prefix in prefixes): continue
+            if spans and spans[-1][1] == start: spans[-1] = (spans[-1][0], end)
+            else: spans.append((start, end))
+        return spans
+    
+    def getBackGenome(self) -> torch.Tensor:
+        """
+        Return the preallocated back buffer [popSize, genomeSize] for the next generation,
+        only allocated on first use or if the genome size changes
+        """
+        if (self.backGenome is None) or (self.backGenome.size() != self.genome.size()):
+            self.backGenome = self.allocateHost(self.genome.size())
+        return self.backGenome
+    
+    def swapGenome(self):
+        """Back buffer becomes the live genome & crate views, old genome becomes the next back buffer"""
+        self.genome, self.backGenome = self.backGenome, self.genome
+        self.bindGenome(self.genome)
+    
+    def shareGenome(self) -> tuple[torch.Tensor]:
+        """
+        Move the genome & its back buffer into shared memory (cpu) so worker processes can map them\n
+        Returns (genome, backGenome), evolution keeps swapping between exactly these two
+        """
+        self.getBackGenome()
+        self.genome.share_memory_()
+        self.backGenome.share_memory_()
+        return self.genome, self.backGenome
+    
+    def commitBackGenome(self, spans: list[tuple[int, int]]):
+        """
+        Make the generation written into the back buffer live\n
+        whole genome evolved: front & back swap, otherwise only the evolved ranges get copied back
+        so frozen layers are never touched
+        """
+        if spans == [(0, self.genomeSize)]: self.swapGenome()
+        else:
+            for start, end in spans: self.genome[:, start:end] = self.backGenome[:, start:end]
+            self.invalidateShadow()
+    
     
     # -------- GET / SET --------
     def getDeepCopyGrid(self) -> dict[torch.Tensor]:
@@ -257,7 +773,17 @@ class MultiGrid():
     def overwriteGrid(self, setTensor: torch.Tensor):
         """Overwrite current textureCrate/grid"""
         self.textureCrate = setTensor
-
+        self.packGenome()
+    
+    def getMembers(self, memberIndex: torch.Tensor) -> torch.Tensor:
+        """Return copies of the given members' genome rows [numMembers, genomeSize]"""
+        return self.genome[memberIndex]
+    
+    def setMembers(self, memberIndex: torch.Tensor, genomeRows: torch.Tensor):
+        """Overwrite the given members' genome rows in place (ex. migrants), crate views stay valid"""
+        self.genome[memberIndex] = genomeRows.to(self.genome)
+        self.invalidateShadow()
+    
     def getL2RegPenalty(self, lambdaMult: float = 1.0) -> torch.Tensor:
         """
         Get L2 Ridge Penalty
@@ -307,6 +833,10 @@ class MultiGrid():
         if li == (len(self.gridcon["layers"]) - 1): prefix = "act"
         return prefix
     
+    def getLayerPrefixes(self) -> list:
+        """Return every layer prefix in layer order, ex. [0, 1, "act"]"""
+        return [self.getLayerPrefix(li) for li in range(len(self.gridcon["layers"]))]
+    
     def gridSizeOutput(self):
         """Grid size as it exists in texture crate"""
         
@@ -344,7 +874,12 @@ class MultiGrid():
             return False
     
     def importGrid(self):
-        """Import a MultiGrid (whole population) with stats"""
+        """
+        Import a MultiGrid (whole population) with stats\n
+        Returns (lineage, esState): the lineage of a seed-chain file (grid gets created from its init seeds,
+        NevoDirector replays the generations), None for a full crate file, and the saved
+        evolution strategy state (Evolution.getEsState()), None if there was none
+        """
         imported = savestate.Import("population.tcdata")
         
         # retrieve stats other than popSize
@@ -354,27 +889,171 @@ class MultiGrid():
         # verify popSize
         self.popSize = self.verifyStat(self.popSize, imported["stats"]["popSize"], "popSize")
         
+        # seed-chain: dropout masks aren't part of the lineage, so they're saved next to it
+        if "lineage" in imported:
+            self.textureCrate.clear()
+            self.createGrid(imported["lineage"]["initSeeds"])
+            self.textureCrate.update(imported["dropmasks"])
+            self.invalidatePlan()
+        
         # set texturecrate
-        self.textureCrate.clear()
-        self.textureCrate = imported["crate"]
+        else:
+            self.textureCrate.clear()
+            self.textureCrate = imported["crate"]
+            self.packGenome()
+            self.createMemory() # the file's memory is shaped by its run's episodes
+            self.compilePlan()
         
-    def exportGrid(self):
-        """Export a MultiGrid with grid stats"""
-        gridToSave = copy.deepcopy(self.textureCrate)
+        # continue every rng stream where the exporting run left off, after createGrid's draws
+        if "rng" in imported: self.rng.setState(imported["rng"])
+        return imported.get("lineage"), imported.get("es")
         
+    def exportGrid(self, lineage: dict = None, esState: dict = None):
+        """
+        Export a MultiGrid with grid stats & rng stream states\n
+        lineage given (evo.encoding "seeds"): save it instead of the crate, O(popSize * generations) ints\n
+        esState given (evo.method "es"): mean & sigma, so a loaded run keeps evolving from them
+        """
         exportDict = {
             "stats": {
                 "popSize": self.popSize,
                 "featureInputLength": self.gridcon["featureInputLength"],
                 "layers": self.gridcon["layers"]
             },
-            "crate": gridToSave
+            "rng": self.rng.getState()
         }
         
+        if lineage is not None:
+            exportDict["lineage"] = lineage
+            exportDict["dropmasks"] = {label: texture.clone() for label, texture in self.textureCrate.items() if label.endswith("_dropmask")}
+        else:
+            # standalone per key copies, genome views don't drag the whole genome storage along
+            exportDict["crate"] = {label: texture.clone() for label, texture in self.textureCrate.items()}
+        if esState is not None: exportDict["es"] = esState
+        
         # savestate export
         savestate.Export(
             exportDict, 
             filename="population", 
             fileExt=".tcdata",
             version=2.0
-        )
\ No newline at end of file
+        )
+
+# --------------------------- PLAN STEPS ---------------------------
+"""
+Layer steps that MultiGrid.compilePlan() strings together
+every texture comes in through args so a step holds no state of its own
+x: [popSize (or 1 if broadcast), rows, prior height] -> [popSize, rows, height]
+"""
+def runPlan(x, dropoutApplicable, plan):
+    """
+    Walk a compiled plan for one timestep\n
+    textures are plain inputs here, so a torch.compile'd runPlan only guards on their
+    shapes/dtypes and swapping textures in evoStep never retraces
+    """
+    for step, textures in plan:
+        x = step(x, dropoutApplicable, *textures)
+    return x
+
+def runSequence(x, dropoutApplicable, plan):
+    """
+    Walk a compiled plan over a whole feature timeline, x: [popSize (or 1 if broadcast), numTimesteps, feat]\n
+    see MultiGrid.feedForwardSequence(), returns [popSize, numTimesteps, actions]
+    """
+    numTimesteps = x.size()[1]
+    for step, textures in plan:
+        
+        # -------------------- DENSE --------------------
+        # bias, dropmask & squash broadcast over timesteps
+        # buffered plans carry an extra out buffer last, sequences allocate their own
+        if step in (denseStep, denseStepBuffered):
+            x = denseStep(x, dropoutApplicable, *textures[:4]) # [popSize, numTimesteps, height]
+        
+        # -------------------- LSTM --------------------
+        elif step in (lstmStep, lstmStepBuffered):
+            # hoisted xt projection for every timestep at once
+            xtWeights, *cellTextures = textures[:6]
+            projected = x @ xtWeights # [popSize, numTimesteps, height * 4]
+            numMembers = projected.size()[0]
+            
+            # recurrence only, outputs collected per timestep
+            x = projected.new_empty([numMembers, numTimesteps, xtWeights.size()[2] // 4])
+            for ts in range(numTimesteps):
+                gates = projected[:, ts, :].view([numMembers, 4, -1]) # [popSize, 4, height]
+                x[:, ts:ts + 1, :] = lstmCell(gates, dropoutApplicable, *cellTextures)
+    return x
+
+def denseStep(x, dropoutApplicable, weight, bias, dropmask, squashFn):
+    """Dense layer: matmul, bias, dropout, squash"""
+    x = x @ weight # [popSize, rows, height]
+    x += bias
+    if dropoutApplicable: x *= dropmask
+    return squashFn(x)
+
+def lstmStep(x, dropoutApplicable, xtWeights, smWeights, bias, dropmask, shortMem, longMem):
+    """Lstm layer: xt matmul & reshape, then lstmCell"""
+    gates = x @ xtWeights # [popSize, 1, height * 4]
+    gates = gates.view([*gates.size()[:-2], 4, smWeights.size()[-1]]) # [popSize, 4, height], explicit for 0 member batches
+    return lstmCell(gates, dropoutApplicable, smWeights, bias, dropmask, shortMem, longMem)
+
+def lstmCell(gates, dropoutApplicable, smWeights, bias, dropmask, shortMem, longMem):
+    """
+    Recurrent half of an lstm layer, everything after the xt matmul\n
+    gates: xt projection [popSize, 4, height], modified in place\n
+    long & short memory get updated in place, returns new short memory [popSize, 1, height]\n
+    episodes ride in an extra dim 1 ([popSize, episodes, 4, height]), so gates index from the back
+    """
+    # add bias & short mem (short mem broadcasts over the 4 gates)
+    gates += bias
+    gates += shortMem * smWeights
+    
+    # squash gate (relu1), scalar (hardtanh11)
+    gates[..., 0:3, :] = torch.nn.functional.hardtanh(gates[..., 0:3, :], 0., 1.) # domain y-dim:[0, 3)
+    gates[..., 3, :] = torch.nn.functional.hardtanh(gates[..., 3, :], -1., 1.) # domain y-dim:[3]
+    
+    # long mem
+    longMem *= gates[..., 0:1, :] # forget
+    gates[..., 1, :] *= gates[..., 3, :] # input mult
+    longMem += gates[..., 1:2, :] # input to long
+    
+    # dropout lands on long mem too, short mem used to alias it at this point
+    if dropoutApplicable: longMem *= dropmask
+    
+    # output scalar squash & mult, short mem keeps its identity for the plan
+    newShort = torch.nn.functional.hardtanh(longMem, -1., 1.) * gates[..., 2:3, :]
+    shortMem.copy_(newShort)
+    return newShort
+
+def denseStepBuffered(x, dropoutApplicable, weight, bias, dropmask, squashFn, out):
+    """Dense layer into a preallocated out buffer [popSize, 1, height], squashFn must be in place"""
+    torch.matmul(x, weight, out=out)
+    out += bias
+    if dropoutApplicable: out *= dropmask
+    return squashFn(out)
+
+def lstmStepBuffered(x, dropoutApplicable, xtWeights, smWeights, bias, dropmask, shortMem, longMem, gatesOut):
+    """
+    Lstm layer with no allocations: xt matmul into a preallocated gatesOut [popSize, 1, height * 4],
+    short mem broadcast instead of repeat, everything else in place\n
+    returns shortMem itself, which the next layer reads
+    """
+    torch.matmul(x, xtWeights, out=gatesOut)
+    gates = gatesOut.view([*gatesOut.size()[:-2], 4, smWeights.size()[-1]]) # [popSize, 4, height]
+    
+    # add bias & short mem
+    gates += bias
+    gates.addcmul_(shortMem, smWeights)
+    
+    # squash gate (relu1), scalar (hardtanh11)
+    gates[..., 0:3, :].clamp_(0., 1.)
+    gates[..., 3, :].clamp_(-1., 1.)
+    
+    # long mem: forget, input mult to long
+    longMem *= gates[..., 0:1, :]
+    longMem.addcmul_(gates[..., 1:2, :], gates[..., 3:4, :])
+    if dropoutApplicable: longMem *= dropmask
+    
+    # output scalar squash & mult straight into short mem
+    torch.clamp(longMem, -1., 1., out=shortMem)
+    shortMem *= gates[..., 2:3, :]
+    return shortMem
\ No newline at end of file
@@ -3,52 +3,76 @@ Neuro Evolution Director
 """
 import torch
 import json5
+import math
 import os # only for debug clear terminal
 from pathlib import Path
-from eco_6.modules.multigrid import MultiGrid
+from eco_6.modules.multigrid import MultiGrid, runPlan
 from eco_6.modules.evolution import Evolution
+from eco_6.modules.rng import RngManager
+from eco_6.modules.eval_pool import EvalPool
+from eco_6.modules.env import rolloutStep
 import eco_6.modules.savestate as savestate
 from eco_6.eco_print import EcoPrint
 torch.autograd.set_grad_enabled(False)
 from deepmerge import always_merger
 
 
+def loadMasterConfig(confo: list = [], configOverride: dict = None) -> dict:
+    """
+    Base config from /eco_6/config/ deep-merged with the named overrides found in "config.json5"
+    (driver problem's directory), then configOverride if given (ex. per island seed)
+    """
+    masterConfig = {}
+    
+    # base config
+    thisPath = Path(__file__).parent.parent # relative path to /eco_6
+    with open(thisPath / "config/sim.json5", "r") as openFile:
+        masterConfig["sim"] = json5.load(openFile)["sim"]
+    with open(thisPath / "config/grid.json5", "r") as openFile:
+        masterConfig["grid"] = json5.load(openFile)["grid"]
+    with open(thisPath / "config/evo.json5", "r") as openFile:
+        masterConfig["evo"] = json5.load(openFile)["evo"]
+    
+    # load overrides
+    oConfig = {}
+    with open("config.json5", "r") as openFile:
+        oConfig = json5.load(openFile)
+    for cf in confo:
+        if not cf in oConfig: print(f"NevoDirector.__init__() conf override {cf} does not exist")
+        always_merger.merge(masterConfig, oConfig[cf]) # deep nest-merges
+    if configOverride is not None: always_merger.merge(masterConfig, configOverride)
+    
+    # print(json5.dumps(masterConfig, indent=4)) # print final config
+    return masterConfig
+
+
 class NevoDirector:
     # --------------------------- INIT ---------------------------
     def __init__(self,
         device,
         dtype,
-        confo: list = [] 
+        confo: list = [],
+        configOverride: dict = None
     ):
         """
         Initialize the Neuro Evolution Director\n
         pass in named base config override found in "config.json5" located
-        in same directory as driver problem .py
+        in same directory as driver problem .py\n
+        configOverride: config dict merged in last, for settings that differ per instance (ex. islands)
         """
         os.system("cls") # clear terminal
         
         
         # ---------------- CONFIG FILES ----------------
-        self.masterConfig = {}
+        self.masterConfig = loadMasterConfig(confo, configOverride)
+        self.confo = confo
+        self.configOverride = configOverride # eval pool workers get it too
+        self.evalPool = None # see evaluate()
         
-        # base config
-        thisPath = Path(__file__).parent.parent # relative path to /eco_6
-        with open(thisPath / "config/sim.json5", "r") as openFile:
-            self.masterConfig["sim"] = json5.load(openFile)["sim"]
-        with open(thisPath / "config/grid.json5", "r") as openFile:
-            self.masterConfig["grid"] = json5.load(openFile)["grid"]
-        with open(thisPath / "config/evo.json5", "r") as openFile:
-            self.masterConfig["evo"] = json5.load(openFile)["evo"]
-        
-        # load overrides
-        oConfig = {}
-        with open("config.json5", "r") as openFile:
-            oConfig = json5.load(openFile)
-        for cf in confo:
-            if not cf in oConfig: print(f"NevoDirector.__init__() conf override {cf} does not exist")
-            always_merger.merge(self.masterConfig, oConfig[cf]) # deep nest-merges
-        
-        # print(json5.dumps(self.masterConfig, indent=4)) # print final config
+        # fitness cache, see getActiveMembers()
+        self.cachedScore = None # [popSize] score of each member's current genome
+        self.cacheValid = None # [popSize] bool, None = nothing cached
+        self.scoreExact = None # [popSize] bool, False = extrapolated by raceEvaluate(), None = all exact
         
         
         # ---------------- STARTUP ----------------
@@ -71,33 +95,82 @@ class NevoDirector:
         
         # init graphing util
         
+        # seeded rng streams per subsystem, saved in checkpoints
+        self.rng = RngManager(self.masterConfig["sim"]["seed"], device)
+        
         # give evo config
         self.evo = Evolution(
             self.masterConfig,
-            self.gconf
+            self.gconf,
+            self.rng
         )
         
-        # half precision speedups (not implemented, lives in sim["allowHalfPrecision"])
+        # half precision: evolution on the full precision genome, feed forward on a
+        # sim["halfPrecisionDtype"] shadow of it (see MultiGrid.refreshShadow())
         
         
         # ---------------- POPULATING ----------------
         # all methods give config, only "load" won't use since it overwrites with file stats
         self.grid = MultiGrid(
             self.masterConfig,
-            self.gconf
+            self.gconf,
+            self.rng
         )
         
+        encoding = self.masterConfig["evo"]["encoding"]
+        if encoding not in ["full", "seeds"]:
+            self.e.errorize(f"NevoDirector.__init__() unknown evo encoding: {encoding}, using full\n")
+        
         # ~~ NEW ~~
-        if(self.masterConfig["sim"]["populate"] == "new"): self.grid.createGrid() # new random gen from grid
+        if(self.masterConfig["sim"]["populate"] == "new"):
+            # new random gen from grid, seeded per member for a seed-chain lineage
+            if encoding == "seeds": self.grid.createGrid(self.evo.createLineage())
+            else: self.grid.createGrid()
         
         # ~~ LOAD ~~
         elif(self.masterConfig["sim"]["populate"] == "load"): 
             # overwrite self.masterConfig["sim"]["populate"]d grid with a whole file
-            self.grid.importGrid()
+            lineage, esState = self.grid.importGrid()
+            if esState is not None: self.evo.setEsState(esState)
+            if lineage is not None:
+                # seed-chain file: regenerate the population, keeps encoding seeds from here on
+                self.evo.lineage = lineage
+                self.replayLineage()
+            elif encoding == "seeds":
+                self.e.warn("NevoDirector.__init__() full crate file has no lineage to seed-encode, using full\n")
             self.grid.resetMemory() # reset lstm memory
         
         # ~~ ERRORIZE ~~
         else: self.e.errorize(f"eco.evo.Evolution() tried to init with repopulate:str set to {self.masterConfig["sim"]["populate"]}")
+        
+        # ~~ METHOD ~~
+        method = self.masterConfig["evo"]["method"]
+        if method not in ["ga", "es"]:
+            self.e.errorize(f"NevoDirector.__init__() unknown evo method: {method}, using ga\n")
+        elif (method == "es") and (self.evo.lineage is not None):
+            self.e.warn("NevoDirector.__init__() evo method es samples around a mean, no lineage to seed-encode, using full\n")
+            self.evo.lineage = None
+        
+        # ~~ ENGINE ~~
+        # compiled: per-timestep plan walk gets traced into one graph (bias, dropout, squash fused)
+        # traced once per feature shape & dropout flag, textures are graph inputs so evoStep won't retrace
+        # compacted member counts (terminateMembers(), cached members, races) can be anything, after the
+        # first new count the member dim goes dynamic instead of retracing into dynamo's recompile limit
+        if self.masterConfig["grid"]["engine"] == "compiled":
+            self.grid.runPlan = torch.compile(runPlan)
+        elif self.masterConfig["grid"]["engine"] != "eager":
+            self.e.errorize(f"NevoDirector.__init__() unknown grid engine: {self.masterConfig["grid"]["engine"]}, using eager\n")
+        
+        # compiled rollout: observe, feed forward, env physics & score of a timestep traced into one graph
+        # compacted member counts change every race rung, so that dim may go dynamic instead of retracing each
+        self.rolloutStep = rolloutStep
+        if self.masterConfig["sim"]["rolloutEngine"] == "compiled":
+            self.rolloutStep = torch.compile(rolloutStep)
+        elif self.masterConfig["sim"]["rolloutEngine"] != "eager":
+            self.e.errorize(f"NevoDirector.__init__() unknown sim rolloutEngine: {self.masterConfig["sim"]["rolloutEngine"]}, using eager\n")
+        # members finished for this episode, see terminateMembers()
+        self.terminated = torch.zeros([self.grid.popSize], dtype=torch.bool, device=device)
+        
         self.e.white(f"grid neuron size by layer: {self.grid.gridSizeOutput()}")
         self.e.dgrey("... ")
         self.e.okay() if self.grid.textureCrate != {} else self.e.errorize(msg=": grid did not init properly")
@@ -111,59 +184,305 @@ class NevoDirector:
         """
         High-Level setFeatures & Feed Forward\n
         inference=False (default) if training, =True if inference/test/validation
-        Returns actionspace [popSize, actions]
+        Returns actionspace [popSize, 1, actions], [popSize, episodes, 1, actions] with sim["episodes"] > 1\n
+        a fresh tensor every call, except with grid["buffered"]: one reused buffer the next call overwrites
+        (compacted & chunked grids too), clone it to keep it across calls
         """
         self.grid.checkFeatureShape(featureInputs)
         self.grid.feedForward(inference)
         #print(f"{self.grid.currVal}\n")
         return self.grid.currVal
+
+    def feedForwardSequence(self, featureSequence: torch.Tensor, inference: bool = False) -> torch.Tensor:
+        """
+        Open-loop Feed Forward over a whole feature timeline\n
+        use when every timestep's features are known in advance (.xtn dumps, fixed timelines),
+        not when actions feed back into the next features (polecart)\n
+        featureSequence size must be either:\n
+        2d: [numTimesteps, featureInputLength] (broadcast)\n
+        3d: [numTimesteps, popSize, featureInputLength]\n
+        Returns actionspace [numTimesteps, popSize, actions]
+        """
+        if not self.grid.checkSequenceShape(featureSequence): return None
+        return self.grid.feedForwardSequence(featureSequence, inference)
+
+    def envStep(self, env, inference: bool = False) -> torch.Tensor:
+        """
+        One closed-loop timestep on a batched environment (modules/env.py):
+        feed env.observe() forward, env.step() every member's actions\n
+        Returns env.reward [popSize, episodes], a texture the next step overwrites
+        """
+        env.step(self.feedForward(env.observe(), inference))
+        return env.reward
+    
+    def rollout(self, env, numTimesteps: int, inference: bool = False, history: dict = None) -> torch.Tensor:
+        """
+        numTimesteps closed-loop envStep()s without going back to the driver, picks up wherever
+        env is (reset() it for a new episode, call again to continue, ex. raceEvaluate() segments)\n
+        the population's features are checked once, then every timestep is a single rolloutStep()
+        (torch.compile'd with sim["rolloutEngine"] "compiled"), compacted grids included; chunked grids
+        fall back to envStep()\n
+        compiled steps guard on the env object, keep one env per director instead of a new one per generation\n
+        history: {env attribute: [numTimesteps, ...] texture}, frame ts gets a copy of the attribute
+        after timestep ts (ex. {"theta": thetaHistory[1:]} for a session replay), None = nothing recorded\n
+        Returns score [popSize, episodes]: env.reward summed over these timesteps
+        """
+        score = torch.zeros_like(env.reward)
+        if numTimesteps <= 0: return score
+        
+        grid = self.grid
+        grid.checkFeatureShape(env.observe())
+        if grid.chunkDevice is not None:
+            for ts in range(numTimesteps):
+                score += self.envStep(env, inference)
+                if history is not None:
+                    for name, frames in history.items(): frames[ts].copy_(getattr(env, name))
+            return score
+        
+        # plan & shadow are fixed for the whole rollout
+        if grid.shadowStale: grid.refreshShadow()
+        if grid.plan is None: grid.compilePlan()
+        dropoutApplicable = (grid.gridcon["dropout"] > 0.0) and (inference == False)
+        for ts in range(numTimesteps):
+            self.rolloutStep(env, score, dropoutApplicable, grid.plan, grid.computeDtype, grid.memberIndex)
+            if history is not None:
+                for name, frames in history.items(): frames[ts].copy_(getattr(env, name)) # outside the compiled step, ts would retrace it
+        return score
+
+    def reduceEpisodes(self, episodeScore: torch.Tensor) -> torch.Tensor:
+        """
+        sim["episodes"] > 1: every member ran episodes initial conditions as one batch
+        (genome shared as views, lstm memory per episode), reduce their scores to one per member\n
+        episodeScore [popSize, episodes], sim["episodeReduce"]: mean, min or quantile (sim["episodeQuantile"])\n
+        Returns score [popSize]
+        """
+        simcon = self.masterConfig["sim"]
+        if simcon["episodeReduce"] == "min": return episodeScore.amin(dim=1)
+        if simcon["episodeReduce"] == "quantile":
+            return torch.quantile(episodeScore.float(), simcon["episodeQuantile"], dim=1).to(episodeScore.dtype)
+        if simcon["episodeReduce"] != "mean":
+            self.e.errorize(f"NevoDirector.reduceEpisodes() unknown sim episodeReduce: {simcon["episodeReduce"]}, using mean\n")
+        return episodeScore.mean(dim=1)
+
+    def raceEvaluate(self, evalSegment, numTimesteps: int = None) -> torch.Tensor:
+        """
+        Successive halving over sim["racing"]: every member runs a short horizon, only the top
+        keep fraction runs on to the next, longer one, rungs cuts before the full numTimesteps\n
+        evalSegment(ndir, startTs, endTs) -> score [popSize]: run timesteps [startTs, endTs) of the problem,
+        return every member's score accumulated over [0, endTs)\n
+        drivers keep stepping their whole population, the grid is compacted to the racing members
+        so feedForward() only computes them (inactive rows output 0)\n
+        losers get loserScore "extrapolate" (score * numTimesteps / endTs) or "floor" (lowest finished score)\n
+        numTimesteps: default sim["numTimesteps"], rung horizons are numTimesteps * keep^(rungs - rung)\n
+        Returns score [popSize], members with a cached score (sim["cacheFitness"]) never run
+        """
+        racecon = self.masterConfig["sim"]["racing"]
+        if numTimesteps is None: numTimesteps = self.masterConfig["sim"]["numTimesteps"]
+        if racecon["loserScore"] not in ["extrapolate", "floor"]:
+            self.e.errorize(f"NevoDirector.raceEvaluate() unknown sim racing loserScore: {racecon["loserScore"]}, using extrapolate\n")
+        
+        horizons = [max(1, round(numTimesteps * racecon["keep"] ** (racecon["rungs"] - rung))) for rung in range(racecon["rungs"])]
+        horizons.append(numTimesteps)
+        
+        activeIndex = self.getActiveMembers().nonzero().view([-1]) # racing members, terminated ones keep racing on their score
+        raceScore = torch.zeros([self.grid.popSize], **self.gconf)
+        loserIndex = []
+        startTs = 0
+        for endTs in horizons:
+            if activeIndex.numel() == 0: break # everything cached
+            runIndex = activeIndex[~self.terminated[activeIndex]]
+            if runIndex.numel() < self.grid.popSize: self.grid.compactMembers(runIndex)
+            score = evalSegment(self, startTs, endTs)
+            startTs = endTs
+            if endTs == numTimesteps: break
+            
+            # ~~ CUT ~~ bottom of the racing members drop out with their extrapolated score
+            ranked = activeIndex[torch.argsort(score[activeIndex], descending=True)]
+            numKeep = math.ceil(ranked.numel() * racecon["keep"])
+            raceScore[ranked[numKeep:]] = score[ranked[numKeep:]] * (numTimesteps / endTs)
+            loserIndex.append(ranked[numKeep:])
+            activeIndex = ranked[:numKeep]
+        self.grid.expandMembers()
+        
+        # ~~ FINISHERS ~~
+        if activeIndex.numel() > 0: raceScore[activeIndex] = score[activeIndex]
+        raceScore = self.mergeCachedScores(raceScore)
+        self.scoreExact = torch.ones([self.grid.popSize], dtype=torch.bool, device=self.gconf["device"])
+        if loserIndex:
+            loserIndex = torch.cat(loserIndex)
+            self.scoreExact[loserIndex] = False
+            if racecon["loserScore"] == "floor": raceScore[loserIndex] = raceScore[self.scoreExact].min()
+        return raceScore
+
+    
+    def evaluate(self, evalGeneration) -> torch.Tensor:
+        """
+        Run evalGeneration(ndir) -> score [popSize] (feed forward & environment) for the whole population\n
+        sim["evalWorkers"] > 0: the population gets sharded across that many cpu worker processes,
+        each runs evalGeneration on its own NevoDirector bound to its rows of the shared genome,
+        starting from this director's "env" rng stream, see modules/eval_pool.py for when the
+        scores match evalWorkers 0
+        """
+        if self.masterConfig["sim"]["evalWorkers"] <= 0: return evalGeneration(self)
+        
+        # (re)start the pool for a new evalGeneration
+        if (self.evalPool is not None) and (self.evalPool.evalGeneration is not evalGeneration): self.closeEvalPool()
+        if self.evalPool is None: self.evalPool = EvalPool(self, evalGeneration)
+        return self.evalPool.evaluate()
+    
+    def closeEvalPool(self):
+        """Stop the evaluate() worker processes"""
+        if self.evalPool is not None: self.evalPool.close()
+        self.evalPool = None
     
     
     # --------------------------- MEMBER EVOLUTION ---------------------------
     def evoStep(self, scoreTexture_1d: torch.Tensor):
         """
         Automatically evolves all weights and biases found in self.grid.textureCrate\n
+        (all backed by the flat self.grid.genome)\n
         based on evolution config\n
         Pass in ssn.score (or a 1d score texture) from main problem driver code
         --
         will also reset lstm memory
         """
-        # ~~ DESTINATION MASK ~~
-        self.evo.createDestinationMask(scoreTexture_1d)
+        isEs = self.masterConfig["evo"]["method"] == "es"
+        self.grid.expandMembers() # a race may have left the grid on a member subset
+        
+        # ~~ SELECTION PLAN ~~ destination mask, tourney winners & cross partners, once per generation
+        if not isEs: self.evo.createSelectionPlan(scoreTexture_1d)
         # print(f"{self.evo.destinationMask}")
         # debug known dest mask
         # self.evo.destinationMask = torch.tensor([10, 20, 80, 70, 0, 55], **self.gconf).view([-1, 1, 1])
         
+        # ~~ DEFROST ~~ genome column ranges of the layers allowed to evolve this generation
+        spans = self.grid.getGenomeSpans(self.evo.createDefrostPlan(self.grid.getLayerPrefixes()))
+        
         # ~~ EVOLVE ~~ based on destination mask
-        for label, originTexture in self.grid.textureCrate.items():
-            
-            # check eligibility: any weight or bias
-            if ("weight" in label) or ("bias" in label):
-            # if label == "act_dense_weight": # DEBUG
-                mergeTexture = torch.zeros_like(originTexture, **self.gconf) # feed evo outputs into here
-                # print(f"b4 {originTexture}")
-                
-                mergeTexture = self.evo.opTourney(originTexture, scoreTexture_1d)
-                mergeTexture = self.evo.opCross(originTexture, mergeTexture)
-                mergeTexture = self.evo.opFork(originTexture, mergeTexture)
-                mergeTexture = self.evo.opReroll(originTexture, mergeTexture)
-                mergeTexture = self.evo.opEliteStayover(originTexture, mergeTexture)
-    
-                # assign real grid
-                self.grid.textureCrate[label] = mergeTexture
+        # every weight & bias lives in the flat genome, so each op runs once per defrosted range
+        # next generation is written into the preallocated back buffer
+        originTexture = self.grid.genome
+        backTexture = self.grid.getBackGenome()
+        if isEs:
+            # evolution strategy: ranked samples move the mean, next samples around it
+            self.evo.esStep(originTexture, backTexture, scoreTexture_1d, spans)
+        elif self.evo.lineage is not None:
+            # seed-chain: per member seeded ops, recorded so the generation can be replayed
+            self.evo.applyGeneration(originTexture, backTexture, self.evo.recordGeneration(spans))
+        else:
+            for start, end in spans:
+                mergeTexture = backTexture[:, start:end]
+                self.evo.opGather(originTexture[:, start:end], mergeTexture) # elite & stayover already stay as themselves
+                self.evo.opCross(originTexture[:, start:end], mergeTexture)
+                self.evo.opFork(originTexture[:, start:end], mergeTexture)
+                self.evo.opReroll(originTexture[:, start:end], mergeTexture)
+        
+        # assign real grid
+        self.grid.commitBackGenome(spans)
+        
+        # ~~ FITNESS CACHE ~~ members still carrying an already scored genome
+        self.updateFitnessCache(scoreTexture_1d, spans)
         
         # ~~ REFRESH DROPOUT IF APPLICABLE ~~
         if 1.0 > self.masterConfig["grid"]["dropout"] > 0.0: self.grid.refreshDropoutMask()
         
         # reset lstm memory
         self.grid.resetMemory()
+        self.resetMembers()
         
         # print(f"af {self.grid.textureCrate['act_dense_weight']}")
         self.e.okay()
         
     
+    # --------------------------- FITNESS CACHE ---------------------------
+    def isCacheable(self) -> bool:
+        """sim["cacheFitness"] only holds while a genome always scores the same: no es resampling, no dropout"""
+        return (
+            self.masterConfig["sim"]["cacheFitness"]
+            and (self.masterConfig["evo"]["method"] != "es")
+            and not (1.0 > self.masterConfig["grid"]["dropout"] > 0.0)
+        )
+    
+    def updateFitnessCache(self, scoreTexture_1d: torch.Tensor, spans: list[tuple[int, int]]):
+        """
+        After evolution, cache the score of every member whose genome is identical to one just scored\n
+        elite 0 & stayover 70 keep their own score (no genes changed), tourney 10 takes its winner's,
+        but only when every layer was defrosted this generation: the copy then covers the whole genome,
+        otherwise the member's frozen columns are still its own and it has to be scored again
+        """
+        if not self.isCacheable():
+            self.cacheValid = None
+            self.scoreExact = None
+            return
+        
+        codes = self.evo.destinationMask.view([-1])
+        unchanged = (codes == 0) | (codes == 70)
+        if spans == [(0, self.grid.genomeSize)]: unchanged |= (codes == 10) # whole genome copied from the winner
+        
+        # extrapolated race scores never get cached
+        if self.scoreExact is not None: unchanged &= self.scoreExact[self.evo.parentIndex]
+        self.scoreExact = None
+        
+        # parentIndex: elite & stayover point at themselves, tourney at its winner
+        self.cachedScore = scoreTexture_1d[self.evo.parentIndex]
+        self.cacheValid = unchanged
+    
+    def mergeCachedScores(self, scoreTexture_1d: torch.Tensor) -> torch.Tensor:
+        """Return scoreTexture_1d [popSize] with every cached member's score taken from the cache"""
+        if self.cacheValid is None: return scoreTexture_1d
+        return torch.where(self.cacheValid, self.cachedScore, scoreTexture_1d)
+    
+    
+    # --------------------------- ACTIVE MEMBERS ---------------------------
+    def getActiveMembers(self) -> torch.Tensor:
+        """
+        bool [popSize], True for members that still need feed forward this episode\n
+        False: terminated (terminateMembers()) or, with sim["cacheFitness"], carrying an unchanged,
+        already scored genome, drivers fill those scores back in with mergeCachedScores()
+        """
+        active = ~self.terminated
+        if self.cacheValid is not None: active &= ~self.cacheValid
+        return active
+    
+    def terminateMembers(self, memberIndex: torch.Tensor):
+        """
+        Mark members finished for the rest of this episode (ex. a failure state),
+        memberIndex: original member indices or a bool mask [popSize]\n
+        once fewer than grid["compactBelow"] of the members feed forward currently runs are left,
+        the grid compacts to the survivors (see MultiGrid.compactMembers()) and keeps running the
+        smaller batch, feedForward() still takes & returns [popSize] tensors\n
+        terminated members' outputs are meaningless (0 once compacted), their score is whatever the driver froze\n
+        cleared by resetMembers(), which evoStep() calls
+        """
+        self.terminated[memberIndex] = True
+        running = self.grid.getActiveMask()
+        survivors = running & ~self.terminated
+        if survivors.sum() < self.masterConfig["grid"]["compactBelow"] * running.sum(): self.grid.compactMembers(survivors)
+    
+    def resetMembers(self):
+        """
+        New episode: clear terminations, feed forward runs on the whole population again\n
+        except for cached members (sim["cacheFitness"]) if they are at least 1 - grid["compactBelow"] of it,
+        feedForward() & feedForwardSequence() both run compacted, cached rows output 0
+        """
+        self.terminated.zero_()
+        self.grid.expandMembers()
+        active = self.getActiveMembers()
+        if active.sum() < self.masterConfig["grid"]["compactBelow"] * self.grid.popSize: self.grid.compactMembers(active)
+    
+    
+    def replayLineage(self):
+        """
+        Regenerate the population from self.evo.lineage, grid must already be created from its init seeds\n
+        bit-identical to the run that recorded it as long as evo rates match
+        """
+        for generation in self.evo.lineage["generations"]:
+            self.evo.applyGeneration(self.grid.genome, self.grid.getBackGenome(), generation)
+            self.grid.commitBackGenome(generation["spans"])
+        
+    
     # --------------------------- UTILS ---------------------------
-    def exportGrid(self): self.grid.exportGrid()
+    def exportGrid(self): self.grid.exportGrid(self.evo.lineage, self.evo.getEsState())
     def getRequiredFeatureShape(self): self.grid.getRequiredFeatureShape()
     def getPerfGraphSlice(self, scoreTexture): return self.evo.getPerfGraphSlice(scoreTexture)
     
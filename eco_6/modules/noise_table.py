@@ -0,0 +1,65 @@
+"""
+Noise Table
+one large pregenerated standard normal table, created once at startup (or mmapped from a file)
+fork, reroll & es perturbations copy slices of it at random offsets instead of drawing fresh normals
+--
+a perturbation is fully identified by its offset (and the scale it gets multiplied by),
+every run, island & eval worker with the same evo.noiseTable seed & size sees the same table,
+with a path they all map the same file so the os keeps one copy of it
+--
+file layout: int64 seed, then size float32s, a file of another seed or size gets regenerated
+"""
+import os
+import sys
+import random
+import tempfile
+import torch
+
+HEADER = 2 # float32 slots in front of the table holding its int64 seed
+
+
+class NoiseTable:
+    def __init__(self, size: int, seed: int, gconf, path: str = ""):
+        """size floats, path "" keeps the table in memory, otherwise it's mapped from path (written on first use)"""
+        self.size = size
+        
+        if path: table = self.mapFile(path, size, seed)
+        else: table = torch.empty([size], dtype=torch.float32).normal_(generator=torch.Generator().manual_seed(seed))
+        
+        # no copy for a cpu float32 grid, so a mapped table stays mapped
+        self.table = table.to(**gconf)
+    
+    def mapFile(self, path: str, size: int, seed: int) -> torch.Tensor:
+        """
+        Map a float32 table file, generating it first if it's missing, a different size or seed\n
+        generated in a temp file next to path & renamed into place, so islands / eval workers
+        starting together never map a half filled table
+        """
+        if not self.isValidFile(path, size, seed):
+            fd, tempPath = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+            os.close(fd)
+            try:
+                data = torch.from_file(tempPath, shared=True, size=HEADER + size, dtype=torch.float32) # writes through to the file
+                data[:HEADER].view(torch.int64).fill_(seed)
+                data[HEADER:].normal_(generator=torch.Generator().manual_seed(seed))
+                del data
+                os.replace(tempPath, path)
+            except PermissionError:
+                # windows won't replace a file another process has mapped, that one is valid by now
+                if not self.isValidFile(path, size, seed): raise
+            finally:
+                if os.path.exists(tempPath): os.remove(tempPath)
+        
+        return torch.from_file(path, shared=False, size=HEADER + size, dtype=torch.float32)[HEADER:]
+    
+    def isValidFile(self, path: str, size: int, seed: int) -> bool:
+        """path holds a complete table of this size & seed"""
+        if not os.path.exists(path) or (os.path.getsize(path) != (HEADER + size) * 4): return False
+        with open(path, "rb") as openFile:
+            return int.from_bytes(openFile.read(8), sys.byteorder, signed=True) == seed
+    
+    def sample(self, count: int, host: random.Random) -> torch.Tensor|None:
+        """[count] view at a random offset drawn from host, None if count doesn't fit the table"""
+        if count > self.size: return None
+        offset = host.randrange(self.size - count + 1)
+        return self.table[offset:offset + count]
@@ -0,0 +1,70 @@
+"""
+RNG Manager
+one seeded stream per subsystem so a run can be replayed and a slow generation bisected on identical workloads
+--
+streams:
+selection: destination mask, tourney & cross partners, defrost rolls, lineage record seeds
+fork, cross, reroll: evolution operators
+es: evolution strategy samples
+dropout: dropout masks
+init: new population weights, lineage init seeds
+env: problem driver randomness (ex. polecart start angle)
+--
+every stream has a torch.Generator on the grid device for tensor draws
+and a python random.Random for host side draws (binomial counts, per layer rolls),
+all seeded from the one sim["seed"]
+"""
+import torch
+import random
+
+
+class RngManager:
+    # new streams only ever get appended so existing stream seeds stay the same
+    STREAMS = ["selection", "fork", "cross", "reroll", "dropout", "init", "env", "es"]
+    
+    def __init__(self, seed: int|None, device):
+        """
+        seed None: draws a random seed, it's still saved in checkpoints so the run can be replayed\n
+        use as rng["fork"] for the torch.Generator, rng.host("fork") for the random.Random
+        """
+        self.seed = seed if seed is not None else random.SystemRandom().randrange(2**62)
+        self.device = device
+        
+        # stream seeds derived from the sim seed
+        root = torch.Generator().manual_seed(self.seed)
+        streamSeeds = torch.randint(0, 2**62, [len(self.STREAMS)], generator=root).tolist()
+        
+        self.generators = {}
+        self.hosts = {}
+        for name, streamSeed in zip(self.STREAMS, streamSeeds):
+            self.generators[name] = torch.Generator(device=device).manual_seed(streamSeed)
+            self.hosts[name] = random.Random(streamSeed)
+    
+    def __getitem__(self, name: str) -> torch.Generator:
+        return self.generators[name]
+    
+    def host(self, name: str) -> random.Random:
+        return self.hosts[name]
+    
+    def getState(self) -> dict:
+        """Every stream's state for checkpoints, see setState()"""
+        return {
+            "seed": self.seed,
+            "generators": {name: generator.get_state() for name, generator in self.generators.items()},
+            "hosts": {name: host.getstate() for name, host in self.hosts.items()}
+        }
+    
+    def setState(self, state: dict):
+        """Restore streams saved by getState(), streams missing from an older checkpoint keep their seeded state"""
+        self.seed = state["seed"]
+        for name, generatorState in state["generators"].items(): self.generators[name].set_state(generatorState)
+        for name, hostState in state["hosts"].items(): self.hosts[name].setstate(hostState)
+    
+    def getStreamState(self, name: str) -> tuple:
+        """One stream's (generator, host) state, ex. the "env" stream handed to eval workers"""
+        return self.generators[name].get_state(), self.hosts[name].getstate()
+    
+    def setStreamState(self, name: str, state: tuple):
+        """Restore one stream saved by getStreamState()"""
+        self.generators[name].set_state(state[0])
+        self.hosts[name].setstate(state[1])
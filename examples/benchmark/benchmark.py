@@ -0,0 +1,165 @@
+"""
+Benchmark Driver
+~~
+DESCRIPTION OF PROBLEM
+not a problem, times the per-timestep feed forward on a polecart sized grid
+across pop sizes, on cpu so python overhead is what gets measured
+--
+reference: original per-call dispatch (feedForwardReference below)
+plan:      compiled layer plan (MultiGrid.feedForward)
+buffered:  compiled plan into preallocated activation buffers (grid.buffered)
+compiled:  plan walk traced by torch.compile (grid.engine "compiled")
+"""
+# -------- IMPORTS --------
+import sys
+sys.path.append("../..") # point to relative location of /eco_6
+import eco_6.ecosys as eco
+import torch
+import time
+
+DEVICE = torch.device(type="cpu")
+NUM_STEPS = 2000
+POP_CONFIGS = ["pop8", "pop40", "pop160", "pop640"]
+
+
+# -------- REFERENCE --------
+def feedForwardReference(grid, inference: bool):
+    """
+    Original per-call dispatch feed forward on grid (MultiGrid), kept here only as the reference
+    the compiled plan is benchmarked against\n
+    replaces short memory textures, so it invalidates the plan
+    """
+    dropoutApplicable = (grid.gridcon["dropout"] > 0.0) and (inference == False)
+    
+    for li, layer in enumerate(grid.gridcon["layers"]):
+        prefix = grid.getLayerPrefix(li)
+        
+        # -------------------- DENSE --------------------
+        if not layer["memory"]:
+            # matmul and reshape (since it auto flattens)
+            grid.currVal @= grid.textureCrate[f"{prefix}_dense_weight"]
+            grid.currVal = torch.reshape(grid.currVal, [grid.popSize, 1, -1])
+            
+            # bias
+            grid.currVal += grid.textureCrate[f"{prefix}_dense_bias"]
+            
+            # dropout
+            if dropoutApplicable:
+                grid.currVal *= grid.textureCrate[f"{prefix}_dropmask"]
+            
+            # squash
+            thisActivation = layer["squash"]
+            grid.currVal = grid.squash[thisActivation](grid.currVal)
+            
+        # -------------------- LSTM --------------------
+        elif layer["memory"] == "lstm":
+            # xt matmul & reshape
+            grid.currVal @= grid.textureCrate[f"{prefix}_lstm_xt_weights"]
+            grid.currVal = torch.reshape(grid.currVal, [grid.popSize, 4, -1])
+            
+            # short mem repeat, element mult
+            tempVal = grid.textureCrate[f"{prefix}_lstm_short_mem"]
+            tempVal = tempVal.repeat(1, 4, 1)
+            tempVal *= grid.textureCrate[f"{prefix}_lstm_sm_weights"]
+    
+            # add bias & short mem
+            grid.currVal += grid.textureCrate[f"{prefix}_lstm_bias"]
+            grid.currVal += tempVal
+    
+            # squash gate (relu1), scalar (hardtanh11)
+            grid.currVal[:, 0:3, :] = grid.squash["gate"](grid.currVal[:, 0:3, :]) # domain y-dim:[0, 3)
+            grid.currVal[:, 3, :] = grid.squash["scalar"](grid.currVal[:, 3, :]) # domain y-dim:[3]
+    
+            # long mem
+            grid.textureCrate[f"{prefix}_lstm_long_mem"] *= grid.currVal[:, 0:1, :] # forget
+            grid.currVal[:, 1, :] *= grid.currVal[:, 3, :] # input mult
+            grid.textureCrate[f"{prefix}_lstm_long_mem"] += grid.currVal[:, 1:2, :] # input to long
+    
+            # reassign short mem
+            grid.textureCrate[f"{prefix}_lstm_short_mem"] = grid.textureCrate[f"{prefix}_lstm_long_mem"]
+    
+            # apply dropout here
+            if dropoutApplicable:
+                grid.textureCrate[f"{prefix}_lstm_short_mem"] *= grid.textureCrate[f"{prefix}_dropmask"]
+    
+            # output scalar squash & mult
+            grid.textureCrate[f"{prefix}_lstm_short_mem"] = \
+                grid.squash["scalar"](grid.textureCrate[f"{prefix}_lstm_short_mem"]) # output squash
+            grid.textureCrate[f"{prefix}_lstm_short_mem"] *= grid.currVal[:, 2:3, :] # mult
+            
+            # store to next layer
+            grid.currVal = grid.textureCrate[f"{prefix}_lstm_short_mem"]
+        
+        else: print(f"grid.feedForward() ran into invalid layer memory type: {layer["memory"]}")
+    
+    grid.invalidatePlan()
+
+
+# -------- TIMING --------
+def timeSteps(stepFunc, numSteps: int) -> float:
+    """Run stepFunc numSteps times after a short warmup, return microseconds per step"""
+    for _ in range(50): stepFunc()
+    start = time.perf_counter()
+    for _ in range(numSteps): stepFunc()
+    return (time.perf_counter() - start) / numSteps * 1e6
+
+
+def benchPlan(ndir) -> dict:
+    """Reference dispatch vs compiled plan vs buffered plan, same features every step"""
+    features = torch.randn([ndir.grid.popSize, 1, ndir.grid.gridcon["featureInputLength"]], **ndir.gconf)
+    
+    def referenceStep():
+        ndir.grid.checkFeatureShape(features)
+        feedForwardReference(ndir.grid, inference=False)
+    
+    def planStep():
+        ndir.feedForward(features, inference=False)
+    
+    ndir.grid.resetMemory()
+    reference = timeSteps(referenceStep, NUM_STEPS)
+    ndir.grid.resetMemory()
+    plan = timeSteps(planStep, NUM_STEPS)
+    
+    ndir.grid.gridcon["buffered"] = True
+    ndir.grid.invalidatePlan()
+    ndir.grid.resetMemory()
+    buffered = timeSteps(planStep, NUM_STEPS)
+    ndir.grid.gridcon["buffered"] = False
+    ndir.grid.invalidatePlan()
+    
+    return {"reference": reference, "plan": plan, "buffered": buffered}
+
+
+def benchCompiled(ndir) -> dict:
+    """Compiled engine, includes an evoStep between timing runs to show textures swap without a retrace"""
+    features = torch.randn([ndir.grid.popSize, 1, ndir.grid.gridcon["featureInputLength"]], **ndir.gconf)
+    
+    def compiledStep():
+        ndir.feedForward(features, inference=False)
+    
+    ndir.grid.resetMemory()
+    timeSteps(compiledStep, 10) # first trace
+    ndir.evoStep(torch.randn([ndir.grid.popSize], **ndir.gconf))
+    return {"compiled": timeSteps(compiledStep, NUM_STEPS)}
+
+
+# -------- LOOP --------
+results = {}
+for popConfig in POP_CONFIGS:
+    ndir = eco.evo.NevoDirector(DEVICE, torch.float32, ["mainGrid", popConfig])
+    results[popConfig] = benchPlan(ndir)
+    
+    ndir = eco.evo.NevoDirector(DEVICE, torch.float32, ["mainGrid", "compiled", popConfig])
+    results[popConfig].update(benchCompiled(ndir))
+
+# -------- OUTPUT --------
+print("\nus per timestep (lower is better)")
+for popConfig, res in results.items():
+    line = f"{popConfig}\t"
+    line += "\t".join([f"{k}: {v:.1f}" for k, v in res.items()])
+    line += f"\tspeedup: {res["reference"] / min(res.values()):.2f}x"
+    print(line)
+
+print("\nsteps/sec eager vs compiled (higher is better)")
+for popConfig, res in results.items():
+    print(f"{popConfig}\teager: {1e6 / res["plan"]:.0f}\tcompiled: {1e6 / res["compiled"]:.0f}")
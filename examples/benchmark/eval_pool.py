@@ -0,0 +1,57 @@
+"""
+Eval Pool Benchmark Driver
+~~
+DESCRIPTION OF PROBLEM
+not a problem, times NevoDirector.evaluate() of a polecart sized closed loop
+(action feeds back into the next features every timestep) in one process
+vs the population sharded across sim["evalWorkers"] cpu processes
+"""
+# -------- IMPORTS --------
+import sys
+sys.path.append("../..") # point to relative location of /eco_6
+import eco_6.ecosys as eco
+import torch
+import time
+import os
+
+DEVICE = torch.device(type="cpu")
+NUM_GENERATIONS = 5
+NUM_TIMESTEPS = 200
+
+
+# -------- PROBLEM --------
+def evalGeneration(ndir) -> torch.Tensor:
+    """Point mass pushed by the action, score is how close it stays to 0, returns [popSize]"""
+    popSize = ndir.grid.popSize
+    x = torch.zeros([popSize], **ndir.gconf)
+    xDot = torch.zeros([popSize], **ndir.gconf)
+    score = torch.zeros([popSize], **ndir.gconf)
+    for ts in range(NUM_TIMESTEPS):
+        force = ndir.feedForward(torch.stack([x, xDot], dim=1).view([popSize, 1, 2])).view([-1])
+        xDot += (force - .1 * x) * .02
+        x += xDot * .02
+        score -= x.abs()
+    return score
+
+
+# -------- BENCH --------
+def timeEvaluate(numWorkers: int) -> float:
+    """Seconds per generation, pool startup & first generation excluded"""
+    ndir = eco.evo.NevoDirector(DEVICE, torch.float32, ["mainGrid", "pop640"], {"sim": {"evalWorkers": numWorkers}})
+    ndir.evoStep(ndir.evaluate(evalGeneration)) # warmup (starts the pool)
+    
+    start = time.perf_counter()
+    for gen in range(NUM_GENERATIONS): ndir.evoStep(ndir.evaluate(evalGeneration))
+    elapsed = (time.perf_counter() - start) / NUM_GENERATIONS
+    
+    ndir.closeEvalPool()
+    return elapsed
+
+
+if __name__ == "__main__": # workers are spawned processes that re-import this file
+    results = {numWorkers: timeEvaluate(numWorkers) for numWorkers in sorted({0, 2, os.cpu_count() or 1})}
+    
+    print(f"\npop640, {NUM_TIMESTEPS} timesteps, {os.cpu_count()} cores")
+    print(f"{"evalWorkers":>12} {"s / gen":>10} {"speedup":>10}")
+    for numWorkers, elapsed in results.items():
+        print(f"{numWorkers:>12} {elapsed:>10.3f} {results[0] / elapsed:>9.2f}x")
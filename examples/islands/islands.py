@@ -0,0 +1,42 @@
+"""
+Island Model Driver Example
+~~
+DESCRIPTION OF PROBLEM
+open-loop sine tracking: a timeline of phases in, the sine of each phase out
+run by 4 islands on cpu, each its own process evolving its own population,
+top members migrate along the ring every evo.islands.migrationInterval generations
+"""
+# -------- IMPORTS --------
+import sys
+sys.path.append("../..") # point to relative location of /eco_6
+import eco_6.ecosys as eco
+import torch
+import math
+
+DEVICES = [torch.device(type="cpu")] * 4 # one island each
+
+
+# -------- PROBLEM --------
+def evalGeneration(ndir) -> torch.Tensor:
+    """Runs inside every island: score by negative mean squared error over the timeline, returns [popSize]"""
+    numTimesteps = ndir.masterConfig["sim"]["numTimesteps"]
+    phase = torch.linspace(0, 2 * math.pi, numTimesteps, **ndir.gconf)
+    
+    actions = ndir.feedForwardSequence(phase.view([-1, 1]) / math.pi - 1) # [numTimesteps, popSize, 1]
+    error = (actions[:, :, 0] - torch.sin(phase).view([-1, 1])) ** 2
+    return -error.mean(dim=0)
+
+
+# -------- ISLANDS --------
+if __name__ == "__main__": # islands are spawned processes that re-import this file
+    islands = eco.islands.IslandDirector(
+        DEVICES,
+        torch.float32,
+        [ # custom config overrides
+            "mainGrid",
+        ],
+        evalGeneration
+    )
+    
+    for result in islands.run():
+        print(f"island {result["island"]}: best score {result["bestScore"]:.5f}")
@@ -115,6 +115,7 @@ for gen in range(numGenerations):
     ssn.interruptGPU()
 
     # -------- EVOLVE --------
+    ssn.score = ndir.mergeCachedScores(ssn.score) # members that didn't change keep their cached score
     ndir.evoStep(ssn.score) # evolution
     tGraph = ndir.getPerfGraphSlice(ssn.score) # grab highest and lowest elite to graph
     print(f"{tGraph[0]} << best -- ", end="")
@@ -19,12 +19,13 @@ os.system("cls")
 
 # consts
 MEM_INDEX = 33 # 0-5999 please note that members are out-of-order in regards to score
+EPISODE_INDEX = 0 # sessions run with sim episodes > 1 save [TS, pop, episodes]
 GEN_NO = 160 # file name only
 
 # load session
 s4 = eco.evo.savestate.Import(f"gen_{GEN_NO}.s4")
 print(f"INFO: {s4["info"]}")
-# print(f"{s4["trackable"]["x"].size()}") # ex. x = [120, 6] = [TS, pop]
+# print(f"{s4["trackable"]["x"].size()}") # ex. x = [120, 6, 1] = [TS, pop, episodes], older sessions [TS, pop]
 
 # DEBUG::find highest score
 scores = s4["trackable"]["scores"]
@@ -32,10 +33,11 @@ maxIndex = torch.argmax(scores)
 minIndex = torch.argmin(scores)
 print(f"max {scores[maxIndex]} @ {maxIndex}\nmin {scores[minIndex]} @ {minIndex}")
 
-# select all timesteps from member -> 1d each
+# select all timesteps from member (& episode) -> 1d each
 x = s4["trackable"]["x"][:, MEM_INDEX]
 theta = s4["trackable"]["theta"][:, MEM_INDEX]
 force = s4["trackable"]["force"][:, MEM_INDEX]
+if x.dim() > 1: x, theta, force = x[:, EPISODE_INDEX], theta[:, EPISODE_INDEX], force[:, EPISODE_INDEX]
 # print(f"{x}")
 
 """